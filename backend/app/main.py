@@ -1,23 +1,109 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Query
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from starlette.background import BackgroundTask
+from fastapi.responses import JSONResponse, StreamingResponse
 import uvicorn
 from prometheus_client import make_asgi_app, Counter, Histogram
 import time
 import os
+import math
+import json
+import asyncio
+from contextlib import asynccontextmanager
 
 from app.models import ShoppingItem, ComparisonResult
-from app.services.pdf_processor import PDFProcessor
-from app.services.price_comparator import PriceComparator
-from app.services.mongo_service import MongoService
+from app.services.admission_control import AdmissionController, AdmissionRejected, ADMISSION_REJECTIONS, resolve_client
+from app.services.change_feed import ChangeFeed
 
 from typing import List, Optional, Dict, Any
 
+# Modo de execução: "full" (padrão) processa PDFs; "api" serve apenas
+# consultas e nunca importa a pilha de extração (pdfplumber, numpy, ...)
+APP_MODE = os.getenv("APP_MODE", "full").lower()
+PDF_PROCESSING_ENABLED = APP_MODE != "api"
+
+# Limites de admissão
+MAX_SHOPPING_LIST_ITEMS = int(os.getenv("MAX_SHOPPING_LIST_ITEMS", 100))
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", 50))
+# Proxies reversos confiáveis à frente da API (hops lidos do X-Forwarded-For)
+TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", 0))
+
+# Intervalo de heartbeat das conexões SSE ociosas
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", 15))
+
+# Serviços (construídos sob demanda)
+_services: Dict[str, Any] = {}
+
+def get_mongo_service():
+    if "mongo" not in _services:
+        from app.services.mongo_service import MongoService
+        _services["mongo"] = MongoService()
+    return _services["mongo"]
+
+def get_price_comparator():
+    if "comparator" not in _services:
+        from app.services.price_comparator import PriceComparator
+        _services["comparator"] = PriceComparator(get_mongo_service())
+    return _services["comparator"]
+
+def get_pdf_processor():
+    if "pdf" not in _services:
+        from app.services.pdf_processor import PDFProcessor
+        _services["pdf"] = PDFProcessor()
+    return _services["pdf"]
+
+# Feed de mudanças de preço (um cursor no MongoDB por worker)
+change_feed = ChangeFeed()
+
+# Rate limit e concorrência em memória (por worker)
+admission_controller = AdmissionController()
+
+def client_id(request: Request) -> str:
+    return resolve_client(
+        request.headers.get("x-forwarded-for"),
+        request.client.host if request.client else None,
+        TRUSTED_PROXY_COUNT
+    )
+
+def admission_http_error(error: AdmissionRejected) -> HTTPException:
+    headers = {"Retry-After": str(math.ceil(error.retry_after))} if error.retry_after else None
+    return HTTPException(status_code=error.status_code, detail=error.detail, headers=headers)
+
+def admission(endpoint: str):
+    """Dependência que aplica o controle de admissão ao endpoint"""
+    async def dependency(request: Request):
+        try:
+            async with admission_controller.admit(endpoint, client_id(request)):
+                yield
+        except AdmissionRejected as e:
+            raise admission_http_error(e)
+    return dependency
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Conexão com o banco é necessária em qualquer modo; o processador
+    # de PDF fica para o primeiro upload
+    get_price_comparator()
+    # Índices são criados em segundo plano: com o MongoDB fora do ar a
+    # chamada só falha após o timeout de seleção de servidor (~30 s cada)
+    index_task = asyncio.create_task(get_mongo_service().ensure_indexes())
+    feed_task = asyncio.create_task(change_feed.run(get_mongo_service()))
+    yield
+    index_task.cancel()
+    feed_task.cancel()
+    if "pdf" in _services:
+        _services["pdf"].close()
+    if "mongo" in _services:
+        _services["mongo"].close()
+    _services.clear()
+
 # Configuração da aplicação
 app = FastAPI(
     title="Quero Economizar Já API",
     description="API para comparação de preços de supermercados",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Métricas Prometheus
@@ -37,11 +123,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Serviços
-pdf_processor = PDFProcessor()
-price_comparator = PriceComparator()
-mongo_service = MongoService()
-
 # Middleware para métricas
 @app.middleware("http")
 async def metrics_middleware(request, call_next):
@@ -60,12 +141,16 @@ async def root():
     return {
         "message": "Bem-vindo ao Quero Economizar Já API",
         "version": "1.0.0",
+        "mode": APP_MODE,
         "endpoints": {
             "documentation": "/docs",
             "metrics": "/metrics",
             "upload_pdf": "/api/upload-pdf",
             "compare_prices": "/api/compare-prices",
-            "supermarkets": "/api/supermarkets"
+            "supermarkets": "/api/supermarkets",
+            "price_updates": "/api/price-updates",
+            "supermarket_aggregates": "/api/aggregates/{supermarket}",
+            "category_leaderboard": "/api/categories/{category}/leaderboard"
         }
     }
 
@@ -73,7 +158,7 @@ async def root():
 async def health_check():
     return {"status": "healthy", "timestamp": time.time()}
 
-@app.post("/api/upload-pdf")
+@app.post("/api/upload-pdf", dependencies=[Depends(admission("upload"))])
 async def upload_pdf(
     file: UploadFile = File(..., description="Arquivo PDF com promoções"),
     supermarket: str = Query("supermercado", description="Nome do supermercado")
@@ -84,6 +169,12 @@ async def upload_pdf(
     start_time = time.time()
     
     try:
+        if not PDF_PROCESSING_ENABLED:
+            raise HTTPException(
+                status_code=503,
+                detail="Processamento de PDF desabilitado nesta instância (APP_MODE=api)"
+            )
+        
         if not file.filename.lower().endswith('.pdf'):
             raise HTTPException(
                 status_code=400, 
@@ -97,10 +188,25 @@ async def upload_pdf(
                 detail="Arquivo vazio"
             )
         
+        pdf_processor = get_pdf_processor()
+        try:
+            page_count = await run_in_threadpool(pdf_processor.count_pages, content)
+        except Exception as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"PDF inválido: {str(e)}"
+            )
+        if page_count > MAX_PDF_PAGES:
+            ADMISSION_REJECTIONS.labels(endpoint="upload", reason="page_count").inc()
+            raise HTTPException(
+                status_code=413,
+                detail=f"PDF com {page_count} páginas excede o limite de {MAX_PDF_PAGES}"
+            )
+        
         print(f"Processando PDF {file.filename} para {supermarket}...")
         
         products = await pdf_processor.process_pdf(content, supermarket)
-        await mongo_service.store_products(products, supermarket)
+        await get_mongo_service().store_products(products, supermarket)
         
         latency = time.time() - start_time
         print(f"PDF processado em {latency:.2f}s - {len(products)} produtos")
@@ -121,8 +227,15 @@ async def upload_pdf(
             detail=f"Erro interno ao processar PDF: {str(e)}"
         )
 
-@app.post("/api/compare-prices")
-async def compare_prices(shopping_list: List[ShoppingItem]):
+@app.post("/api/compare-prices", dependencies=[Depends(admission("compare"))])
+async def compare_prices(
+    shopping_list: List[ShoppingItem],
+    rank_by: str = Query(
+        "price",
+        regex="^(price|unit_price)$",
+        description="Ordena por preço absoluto ou por preço por kg/L/unidade"
+    )
+):
     """
     Compara preços para uma lista de compras
     """
@@ -135,13 +248,21 @@ async def compare_prices(shopping_list: List[ShoppingItem]):
                 detail="Lista de compras vazia"
             )
         
+        if len(shopping_list) > MAX_SHOPPING_LIST_ITEMS:
+            ADMISSION_REJECTIONS.labels(endpoint="compare", reason="list_size").inc()
+            raise HTTPException(
+                status_code=413,
+                detail=f"Lista de compras excede o limite de {MAX_SHOPPING_LIST_ITEMS} itens"
+            )
+        
         print(f"Comparando preços para {len(shopping_list)} itens...")
         
+        price_comparator = get_price_comparator()
         comparison_results = []
         
         for item in shopping_list:
-            results = await price_comparator.find_best_prices(item)
-            best_option = price_comparator.get_best_option(results)
+            results = await price_comparator.find_best_prices(item, rank_by)
+            best_option = price_comparator.get_best_option(results, rank_by)
             
             # Para Pydantic 1.x, use dict() em vez de model_dump()
             comparison_results.append({
@@ -164,13 +285,61 @@ async def compare_prices(shopping_list: List[ShoppingItem]):
             detail=f"Erro interno ao comparar preços: {str(e)}"
         )
 
+@app.get("/api/price-updates")
+async def price_updates(
+    request: Request,
+    item: List[str] = Query(..., description="Itens da lista de compras a acompanhar")
+):
+    """
+    Canal SSE que envia as mudanças de preço dos itens informados sempre
+    que um supermercado publica um novo encarte
+    """
+    if len(item) > MAX_SHOPPING_LIST_ITEMS:
+        ADMISSION_REJECTIONS.labels(endpoint="price_updates", reason="list_size").inc()
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lista de compras excede o limite de {MAX_SHOPPING_LIST_ITEMS} itens"
+        )
+
+    # A vaga fica presa durante toda a conexão, por isso não usa a dependência admission()
+    try:
+        release = await admission_controller.open_stream("price_updates", client_id(request))
+    except AdmissionRejected as e:
+        raise admission_http_error(e)
+
+    async def event_stream():
+        subscription = change_feed.subscribe(item)
+        try:
+            yield ": conectado\n\n"
+            while True:
+                if subscription.lagged:
+                    subscription.lagged = False
+                    yield "event: resync\ndata: {}\n\n"
+                try:
+                    delta = await asyncio.wait_for(subscription.queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield f"event: price_update\ndata: {json.dumps(delta, ensure_ascii=False)}\n\n"
+        finally:
+            change_feed.unsubscribe(subscription)
+            release()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Garante a liberação mesmo se o stream nunca chegar a iniciar
+        background=BackgroundTask(release)
+    )
+
 @app.get("/api/supermarkets")
 async def get_supermarkets():
     """
     Retorna lista de supermercados disponíveis
     """
     try:
-        supermarkets = await mongo_service.get_available_supermarkets()
+        supermarkets = await get_mongo_service().get_available_supermarkets()
         return {
             "supermarkets": supermarkets,
             "count": len(supermarkets)
@@ -187,7 +356,7 @@ async def get_products(supermarket: str):
     Retorna produtos de um supermercado específico
     """
     try:
-        products = await mongo_service.get_products_by_supermarket(supermarket)
+        products = await get_mongo_service().get_products_by_supermarket(supermarket)
         return {
             "supermarket": supermarket,
             "products": products,
@@ -199,6 +368,52 @@ async def get_products(supermarket: str):
             detail=f"Erro ao obter produtos: {str(e)}"
         )
 
+@app.get("/api/aggregates/{supermarket}")
+async def get_supermarket_aggregates(supermarket: str):
+    """
+    Retorna contagem, preço mínimo, mediana e participação de promoções
+    por categoria de um supermercado
+    """
+    try:
+        aggregates = await get_mongo_service().get_supermarket_aggregates(supermarket)
+        return {
+            "supermarket": supermarket,
+            "categories": aggregates,
+            "count": len(aggregates)
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Erro ao obter agregados: {str(e)}"
+        )
+
+@app.get("/api/categories/{category}/leaderboard")
+async def get_category_leaderboard(
+    category: str,
+    order_by: str = Query(
+        "median_price",
+        regex="^(median_price|min_price|promotion_share)$",
+        description="Campo de ordenação"
+    )
+):
+    """
+    Retorna os supermercados de uma categoria, do mais barato ao mais caro
+    (ou da maior para a menor participação de promoções)
+    """
+    try:
+        leaderboard = await get_mongo_service().get_category_leaderboard(category, order_by)
+        return {
+            "category": category,
+            "order_by": order_by,
+            "supermarkets": leaderboard,
+            "count": len(leaderboard)
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Erro ao obter ranking da categoria: {str(e)}"
+        )
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     uvicorn.run(
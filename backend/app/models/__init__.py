@@ -12,6 +12,8 @@ class PriceResult(BaseModel):
 	price: float
 	promotion: bool
 	found: bool
+	unit: Optional[str] = None
+	unit_price: Optional[float] = None
 
 class ComparisonResult(BaseModel):
 	item: ShoppingItem
@@ -23,4 +25,7 @@ class Product(BaseModel):
 	price: float
 	supermarket: str
 	promotion: bool = False
-	category: str = "outros"
\ No newline at end of file
+	category: str = "outros"
+	quantity: Optional[float] = None
+	unit: Optional[str] = None
+	unit_price: Optional[float] = None
\ No newline at end of file
@@ -0,0 +1,192 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+from prometheus_client import Counter, Histogram
+
+ADMISSION_REJECTIONS = Counter(
+	'admission_rejections_total', 'Requests rejected by admission control', ['endpoint', 'reason']
+)
+ADMISSION_QUEUE_WAIT = Histogram(
+	'admission_queue_wait_seconds', 'Time spent waiting for a concurrency slot', ['endpoint']
+)
+
+class AdmissionRejected(Exception):
+	def __init__(self, status_code: int, reason: str, detail: str, retry_after: float = None):
+		super().__init__(detail)
+		self.status_code = status_code
+		self.reason = reason
+		self.detail = detail
+		self.retry_after = retry_after
+
+def resolve_client(forwarded_for: Optional[str], peer: Optional[str], trusted_proxies: int) -> str:
+	"""
+	Identifica o cliente para o rate limit. Com `trusted_proxies` > 0, o
+	X-Forwarded-For é lido da direita para a esquerda: cada proxy confiável
+	acrescenta um endereço ao final, então o cliente real é o N-ésimo a
+	partir da direita. Entradas à esquerda dele são controladas pelo
+	cliente e são ignoradas.
+	"""
+	if trusted_proxies > 0 and forwarded_for:
+		hops = [hop.strip() for hop in forwarded_for.split(",")]
+		if len(hops) >= trusted_proxies and hops[-trusted_proxies]:
+			return hops[-trusted_proxies]
+	return peer or "anonymous"
+
+class TokenBucketLimiter:
+	"""
+	Token bucket em memória por cliente. Cada cliente recebe `rate`
+	tokens por segundo, acumulando no máximo `burst`.
+	"""
+
+	def __init__(self, rate: float, burst: int, max_clients: int = 10000):
+		self.rate = rate
+		self.burst = burst
+		self.max_clients = max_clients
+		self.buckets: Dict[str, Tuple[float, float]] = {}
+		self.next_prune = 0.0
+
+	def acquire(self, client: str) -> float:
+		"""
+		Consome um token do cliente. Retorna 0 se permitido ou os segundos
+		até o próximo token disponível.
+		"""
+		now = time.monotonic()
+		tokens, last = self.buckets.get(client, (self.burst, now))
+		tokens = min(self.burst, tokens + (now - last) * self.rate)
+
+		if tokens < 1:
+			self.buckets[client] = (tokens, now)
+			return (1 - tokens) / self.rate
+
+		self.buckets[client] = (tokens - 1, now)
+		if len(self.buckets) > self.max_clients and now >= self.next_prune:
+			self._prune(now)
+		return 0.0
+
+	def _prune(self, now: float):
+		"""
+		Remove clientes cujo balde já estaria cheio (sem estado relevante).
+		Roda no máximo uma vez a cada 1/rate segundos para não reconstruir
+		o dicionário a cada requisição quando há muitos clientes ativos.
+		"""
+		refill_time = self.burst / self.rate
+		self.buckets = {
+			client: state for client, state in self.buckets.items()
+			if now - state[1] < refill_time
+		}
+		self.next_prune = now + 1 / self.rate
+
+class ConcurrencyLimiter:
+	"""
+	Limita execuções simultâneas de um endpoint, com fila limitada e
+	prazo máximo de espera por uma vaga
+	"""
+
+	def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+		self.max_queue = max_queue
+		self.queue_timeout = queue_timeout
+		self.semaphore = asyncio.Semaphore(max_concurrent)
+		self.waiting = 0
+
+	@asynccontextmanager
+	async def slot(self, endpoint: str):
+		if not self.semaphore.locked():
+			# Vaga livre: adquire sem passar pela fila
+			await self.semaphore.acquire()
+			ADMISSION_QUEUE_WAIT.labels(endpoint=endpoint).observe(0)
+		else:
+			if self.waiting >= self.max_queue:
+				raise AdmissionRejected(503, "queue_full", "Servidor ocupado, tente novamente em instantes")
+
+			self.waiting += 1
+			start = time.monotonic()
+			try:
+				await asyncio.wait_for(self.semaphore.acquire(), timeout=self.queue_timeout)
+			except asyncio.TimeoutError:
+				raise AdmissionRejected(503, "queue_timeout", "Tempo de espera na fila esgotado, tente novamente")
+			finally:
+				self.waiting -= 1
+				ADMISSION_QUEUE_WAIT.labels(endpoint=endpoint).observe(time.monotonic() - start)
+
+		try:
+			yield
+		finally:
+			self.semaphore.release()
+
+class AdmissionController:
+	"""
+	Controle de admissão por endpoint: rate limit por cliente seguido de
+	limite de concorrência. Configurado por variáveis de ambiente
+	<ENDPOINT>_RATE, <ENDPOINT>_BURST, <ENDPOINT>_MAX_CONCURRENT,
+	<ENDPOINT>_MAX_QUEUE e <ENDPOINT>_QUEUE_TIMEOUT.
+	"""
+
+	DEFAULTS = {
+		"upload": {"rate": 0.2, "burst": 3, "max_concurrent": 2, "max_queue": 4, "queue_timeout": 30.0},
+		"compare": {"rate": 5.0, "burst": 20, "max_concurrent": 32, "max_queue": 128, "queue_timeout": 5.0},
+		# Conexões SSE de longa duração: sem fila, max_concurrent é o teto por worker
+		"price_updates": {"rate": 1.0, "burst": 10, "max_concurrent": 5000, "max_queue": 0, "queue_timeout": 0.0},
+	}
+
+	def __init__(self):
+		self.rate_limiters: Dict[str, TokenBucketLimiter] = {}
+		self.concurrency_limiters: Dict[str, ConcurrencyLimiter] = {}
+
+		for endpoint, defaults in self.DEFAULTS.items():
+			config = {
+				key: type(value)(os.getenv(f"{endpoint.upper()}_{key.upper()}", value))
+				for key, value in defaults.items()
+			}
+			self.rate_limiters[endpoint] = TokenBucketLimiter(config["rate"], config["burst"])
+			self.concurrency_limiters[endpoint] = ConcurrencyLimiter(
+				config["max_concurrent"], config["max_queue"], config["queue_timeout"]
+			)
+
+	def reject(self, endpoint: str, error: AdmissionRejected):
+		"""Registra a rejeição nas métricas e a propaga"""
+		ADMISSION_REJECTIONS.labels(endpoint=endpoint, reason=error.reason).inc()
+		raise error
+
+	def check_rate(self, endpoint: str, client: str):
+		retry_after = self.rate_limiters[endpoint].acquire(client)
+		if retry_after:
+			self.reject(endpoint, AdmissionRejected(
+				429, "rate_limited", "Muitas requisições, tente novamente mais tarde", retry_after
+			))
+
+	async def open_stream(self, endpoint: str, client: str) -> Callable[[], None]:
+		"""
+		Admite uma conexão de longa duração (sem fila). Retorna a função
+		que libera a vaga; pode ser chamada mais de uma vez.
+		"""
+		self.check_rate(endpoint, client)
+
+		semaphore = self.concurrency_limiters[endpoint].semaphore
+		if semaphore.locked():
+			self.reject(endpoint, AdmissionRejected(
+				503, "connection_limit", "Limite de conexões atingido, tente novamente mais tarde"
+			))
+		await semaphore.acquire()
+
+		released = False
+
+		def release():
+			nonlocal released
+			if not released:
+				released = True
+				semaphore.release()
+
+		return release
+
+	@asynccontextmanager
+	async def admit(self, endpoint: str, client: str):
+		self.check_rate(endpoint, client)
+
+		try:
+			async with self.concurrency_limiters[endpoint].slot(endpoint):
+				yield
+		except AdmissionRejected as e:
+			self.reject(endpoint, e)
@@ -0,0 +1,107 @@
+import asyncio
+from typing import Dict, List, Set
+
+def compute_catalog_changes(old_products: List[Dict], new_products: List[Dict]) -> List[Dict]:
+	"""
+	Compara o catálogo anterior de um supermercado com o novo e retorna
+	as mudanças por produto (added, removed ou price_changed)
+	"""
+	old_prices = {p['name']: float(p['price']) for p in old_products}
+	new_prices = {p['name']: float(p['price']) for p in new_products}
+	changes = []
+
+	for name, price in new_prices.items():
+		if name not in old_prices:
+			changes.append({'name': name, 'change': 'added', 'old_price': None, 'new_price': price})
+		elif round(old_prices[name], 2) != round(price, 2):
+			changes.append({'name': name, 'change': 'price_changed', 'old_price': old_prices[name], 'new_price': price})
+
+	for name, price in old_prices.items():
+		if name not in new_prices:
+			changes.append({'name': name, 'change': 'removed', 'old_price': price, 'new_price': None})
+
+	return changes
+
+class Subscription:
+	"""
+	Assinatura de um cliente: recebe apenas as mudanças que casam com
+	os itens da sua lista de compras
+	"""
+
+	def __init__(self, items: List[str], max_pending: int):
+		self.items = sorted({item.strip().lower() for item in items if item.strip()})
+		self.queue: "asyncio.Queue[Dict]" = asyncio.Queue(maxsize=max_pending)
+		self.lagged = False
+
+class ChangeFeed:
+	"""
+	Distribui eventos de mudança de catálogo para os clientes conectados
+	a este worker. Cada worker mantém um único cursor no MongoDB; as
+	conexões ociosas ficam apenas aguardando na própria fila.
+
+	As assinaturas são indexadas por termo: cada evento é comparado uma
+	vez por termo distinto, independentemente de quantos clientes o seguem.
+	"""
+
+	def __init__(self, max_pending: int = 100, terms_per_slice: int = 500):
+		self.max_pending = max_pending
+		self.terms_per_slice = terms_per_slice
+		self.terms: Dict[str, Set[Subscription]] = {}
+
+	def subscribe(self, items: List[str]) -> Subscription:
+		subscription = Subscription(items, self.max_pending)
+		for item in subscription.items:
+			self.terms.setdefault(item, set()).add(subscription)
+		return subscription
+
+	def unsubscribe(self, subscription: Subscription):
+		for item in subscription.items:
+			subscribers = self.terms.get(item)
+			if subscribers is None:
+				continue
+			subscribers.discard(subscription)
+			if not subscribers:
+				del self.terms[item]
+
+	async def dispatch(self, event: Dict):
+		"""
+		Casa o evento com os termos assinados e entrega a cada cliente
+		apenas os seus itens. Cede o event loop a cada fatia de termos.
+		"""
+		names = [change['name'].lower() for change in event['changes']]
+		deltas: Dict[Subscription, List[Dict]] = {}
+
+		for index, (term, subscribers) in enumerate(list(self.terms.items())):
+			if index and index % self.terms_per_slice == 0:
+				await asyncio.sleep(0)
+
+			changes = [change for change, name in zip(event['changes'], names) if term in name]
+			if not changes:
+				continue
+
+			match = {'item': term, 'changes': changes}
+			for subscription in subscribers:
+				deltas.setdefault(subscription, []).append(match)
+
+		for subscription, matches in deltas.items():
+			try:
+				subscription.queue.put_nowait({
+					'supermarket': event['supermarket'],
+					'timestamp': event['timestamp'],
+					'items': matches
+				})
+			except asyncio.QueueFull:
+				# Cliente lento: descarta e avisa para refazer a comparação completa
+				subscription.lagged = True
+
+	async def run(self, mongo_service, retry_delay: float = 5.0):
+		"""Acompanha os eventos publicados no MongoDB e os distribui localmente"""
+		while True:
+			try:
+				async for event in mongo_service.tail_catalog_events():
+					await self.dispatch(event)
+			except asyncio.CancelledError:
+				raise
+			except Exception as e:
+				print(f"Erro no feed de mudanças: {e}")
+			await asyncio.sleep(retry_delay)
@@ -0,0 +1,140 @@
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+MODEL_FORMAT_VERSION = 1
+
+# Dígitos viram "0" para que preços e gramaturas diferentes gerem as mesmas features
+_DIGITS = str.maketrans("0123456789", "0000000000")
+
+_HASH_PRIME = np.uint64(1099511628211)
+_NEWLINE = 10
+
+DEFAULT_MODEL_PATH = os.path.join(
+	os.path.dirname(os.path.dirname(__file__)), "resources", "line_classifier.npz"
+)
+
+class LineClassifier:
+	"""
+	Classificador linear de linhas de encarte (produto x não-produto)
+	sobre n-gramas de bytes com hashing. Todas as linhas de uma página
+	são pontuadas de uma vez, sem laço Python por linha.
+	"""
+
+	def __init__(self, weights: np.ndarray, bias: float = 0.0,
+			ngram_range: Tuple[int, int] = (2, 4), threshold: float = 0.5):
+		self.weights = weights.astype(np.float32)
+		self.bias = float(bias)
+		self.n_features = len(weights)
+		self.ngram_range = ngram_range
+		self.threshold = threshold
+
+	@classmethod
+	def empty(cls, n_features: int = 2 ** 18, ngram_range: Tuple[int, int] = (2, 4)) -> "LineClassifier":
+		return cls(np.zeros(n_features, dtype=np.float32), 0.0, ngram_range)
+
+	@classmethod
+	def load(cls, path: str) -> "LineClassifier":
+		"""Carrega modelo salvo por save()"""
+		with np.load(path) as data:
+			version = int(data["format_version"])
+			if version != MODEL_FORMAT_VERSION:
+				raise ValueError(f"Versão de modelo não suportada: {version}")
+			return cls(
+				data["weights"],
+				float(data["bias"]),
+				(int(data["ngram_min"]), int(data["ngram_max"])),
+				float(data["threshold"])
+			)
+
+	@classmethod
+	def load_default(cls) -> Optional["LineClassifier"]:
+		"""
+		Carrega o modelo de LINE_CLASSIFIER_PATH; retorna None se não houver
+		modelo treinado (o chamador volta para as heurísticas)
+		"""
+		path = os.getenv("LINE_CLASSIFIER_PATH", DEFAULT_MODEL_PATH)
+		if not os.path.exists(path):
+			print(f"Classificador de linhas não encontrado em {path}, usando heurísticas")
+			return None
+		try:
+			return cls.load(path)
+		except Exception as e:
+			print(f"Erro ao carregar classificador de linhas: {e}")
+			return None
+
+	def save(self, path: str):
+		"""
+		Salva o modelo em .npz: pesos float32, bias, faixa de n-gramas,
+		limiar de decisão e versão do formato
+		"""
+		np.savez_compressed(
+			path,
+			format_version=MODEL_FORMAT_VERSION,
+			weights=self.weights,
+			bias=self.bias,
+			ngram_min=self.ngram_range[0],
+			ngram_max=self.ngram_range[1],
+			threshold=self.threshold
+		)
+
+	def featurize(self, lines: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+		"""
+		Gera as features esparsas de todas as linhas de uma vez.
+		Retorna (índice da feature, índice da linha, valor) em formato COO.
+		"""
+		text = "\n".join(f" {line.lower().translate(_DIGITS)} " for line in lines)
+		data = np.frombuffer(text.encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+
+		is_newline = data == _NEWLINE
+		line_of_byte = np.cumsum(is_newline)
+		newline_count = np.concatenate(([0], np.cumsum(is_newline)))
+
+		features = []
+		rows = []
+		for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+			size = len(data) - n + 1
+			if size <= 0:
+				continue
+
+			# Hash polinomial de todos os n-gramas do texto (overflow em uint64 é intencional)
+			hashes = np.full(size, n, dtype=np.uint64)
+			for k in range(n):
+				hashes = hashes * _HASH_PRIME + data[k:k + size]
+
+			# Descarta n-gramas que atravessam a quebra entre duas linhas
+			valid = (newline_count[n:n + size] - newline_count[:size]) == 0
+			features.append(hashes[valid] % np.uint64(self.n_features))
+			rows.append(line_of_byte[:size][valid])
+
+		if not features:
+			empty = np.zeros(0, dtype=np.int64)
+			return empty, empty, np.zeros(0, dtype=np.float32)
+
+		features = np.concatenate(features).astype(np.int64)
+		rows = np.concatenate(rows).astype(np.int64)
+
+		# Normalização por 1/sqrt(n) para linhas longas não dominarem o score
+		counts = np.bincount(rows, minlength=len(lines))
+		values = (1.0 / np.sqrt(np.maximum(counts, 1)))[rows].astype(np.float32)
+
+		return features, rows, values
+
+	def decision_function(self, lines: List[str]) -> np.ndarray:
+		features, rows, values = self.featurize(lines)
+		return np.bincount(
+			rows, weights=self.weights[features] * values, minlength=len(lines)
+		) + self.bias
+
+	def predict_proba(self, lines: List[str]) -> np.ndarray:
+		"""Probabilidade de cada linha conter um produto"""
+		if not lines:
+			return np.zeros(0)
+		proba = 1.0 / (1.0 + np.exp(-self.decision_function(lines)))
+		# Linha em branco não gera n-gramas e seria decidida só pelo bias
+		proba[[not line.strip() for line in lines]] = 0.0
+		return proba
+
+	def predict(self, lines: List[str]) -> np.ndarray:
+		return self.predict_proba(lines) >= self.threshold
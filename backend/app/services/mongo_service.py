@@ -1,12 +1,20 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from typing import List, Dict, Optional
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+from typing import AsyncIterator, List, Dict, Optional
+import asyncio
 import os
+import time
+from statistics import median
 from bson import ObjectId
 
+from app.services.change_feed import compute_catalog_changes
+
 class MongoService:
 	def __init__(self):
 		self.client = None
 		self.db = None
+		self.catalog_events_ready = False
 		self.connect()
 
 	def connect(self):
@@ -16,10 +24,29 @@ class MongoService:
 			self.client = AsyncIOMotorClient(mongo_url)
 			self.db = self.client["economizar_ja"]
 			self.products = self.db["products"]
+			self.aggregates = self.db["aggregates"]
+			self.catalog_events = self.db["catalog_events"]
 			print("Conectado ao MongoDB com sucesso!")
 		except Exception as e:
 			print(f"Erro ao conectar ao MongoDB: {e}")
 
+	def close(self):
+		"""Fecha a conexão com o MongoDB"""
+		if self.client is not None:
+			self.client.close()
+			self.client = None
+
+	async def ensure_indexes(self):
+		"""Cria os índices usados pelas consultas de agregados"""
+		try:
+			await self.aggregates.create_index([("supermarket", 1), ("category", 1)], unique=True)
+			await self.aggregates.create_index([("category", 1), ("median_price", 1)])
+			# Ordenar por preço unitário custa o mesmo que por preço absoluto
+			await self.products.create_index([("price", 1)])
+			await self.products.create_index([("unit_price", 1)])
+		except Exception as e:
+			print(f"Erro ao criar índices: {e}")
+
 	async def store_products(self, products: List[Dict], supermarket: str):
 		"""Armazena produtos no banco de dados"""
 		if not products:
@@ -27,6 +54,11 @@ class MongoService:
 			return
 
 		try:
+			# Catálogo anterior, para publicar apenas o que mudou
+			old_products = await self.products.find(
+				{"supermarket": supermarket}, {"_id": 0, "name": 1, "price": 1}
+			).to_list(length=None)
+
 			# Remove produtos antigos deste supermercado
 			delete_result = await self.products.delete_many({"supermarket": supermarket})
 			print(f"Removidos {delete_result.deleted_count} produtos antigos de {supermarket}")
@@ -35,11 +67,144 @@ class MongoService:
 			insert_result = await self.products.insert_many(products)
 			print(f"Inseridos {len(insert_result.inserted_ids)} produtos de {supermarket}")
 
+			# Atualiza agregados apenas deste supermercado, a partir dos produtos já em memória
+			await self._store_aggregates(products, supermarket)
+
+			await self._publish_catalog_event(compute_catalog_changes(old_products, products), supermarket)
+
 		except Exception as e:
 			print(f"Erro ao armazenar produtos: {e}")
 
-	async def search_products(self, product_name: str, brand: Optional[str] = None) -> List[Dict]:
-		"""Busca produtos por nome e marca opcional"""
+	async def ensure_catalog_events(self):
+		"""
+		Garante que catalog_events existe e é limitada (capped). Coleção
+		limitada permite cursor "tailable": os workers recebem os eventos
+		por push, sem consultar o banco periodicamente. Se ela não existir,
+		um insert_one a criaria sem limite e o tail falharia para sempre.
+		"""
+		if self.catalog_events_ready:
+			return
+
+		try:
+			await self.db.create_collection("catalog_events", capped=True, size=16 * 1024 * 1024)
+		except CollectionInvalid:
+			options = await self.catalog_events.options()
+			if not options.get("capped"):
+				raise RuntimeError(
+					"A coleção catalog_events existe mas não é capped; "
+					"remova-a ou converta-a com convertToCapped"
+				)
+
+		self.catalog_events_ready = True
+
+	async def _publish_catalog_event(self, changes: List[Dict], supermarket: str):
+		"""Publica as mudanças de catálogo para os workers conectados"""
+		if not changes:
+			return
+
+		try:
+			await self.ensure_catalog_events()
+			await self.catalog_events.insert_one({
+				"supermarket": supermarket,
+				"changes": changes,
+				"timestamp": time.time()
+			})
+			print(f"Evento publicado para {supermarket}: {len(changes)} mudanças")
+		except Exception as e:
+			print(f"Erro ao publicar evento de catálogo: {e}")
+
+	async def tail_catalog_events(self) -> AsyncIterator[Dict]:
+		"""
+		Acompanha os eventos de catálogo publicados a partir de agora
+		(cursor tailable com await, um por worker).
+
+		Ao reabrir o cursor, retoma em ordem natural logo após o último
+		evento entregue: _id gerados por processos diferentes não chegam
+		necessariamente em ordem crescente.
+		"""
+		await self.ensure_catalog_events()
+
+		last = await self.catalog_events.find_one({}, sort=[("$natural", -1)])
+		last_id = last["_id"] if last else None
+
+		while True:
+			cursor = self.catalog_events.find({}, cursor_type=CursorType.TAILABLE_AWAIT)
+			skipping = last_id is not None
+
+			while cursor.alive:
+				async for event in cursor:
+					event_id = event.pop("_id")
+					if skipping:
+						skipping = event_id != last_id
+						continue
+					last_id = event_id
+					yield event
+
+				if skipping:
+					# O último evento entregue já foi sobrescrito na coleção limitada
+					print("Feed de mudanças: posição perdida, retomando dos eventos mais recentes")
+					skipping = False
+
+			# Cursor morre quando a coleção está vazia; aguarda o primeiro evento
+			await asyncio.sleep(1)
+
+	async def _store_aggregates(self, products: List[Dict], supermarket: str):
+		"""
+		Materializa, por categoria, contagem, preço mínimo, mediana e
+		participação de promoções dos produtos do supermercado
+		"""
+		by_category: Dict[str, List[Dict]] = {}
+		for product in products:
+			by_category.setdefault(product.get("category", "outros"), []).append(product)
+
+		updated_at = time.time()
+		aggregates = []
+		for category, items in by_category.items():
+			prices = [float(item["price"]) for item in items]
+			promotions = sum(1 for item in items if item.get("promotion"))
+			aggregates.append({
+				"supermarket": supermarket,
+				"category": category,
+				"count": len(items),
+				"min_price": min(prices),
+				"median_price": median(prices),
+				"promotion_share": promotions / len(items),
+				"updated_at": updated_at
+			})
+
+		try:
+			await self.aggregates.delete_many({"supermarket": supermarket})
+			await self.aggregates.insert_many(aggregates)
+			print(f"Agregados atualizados para {supermarket}: {len(aggregates)} categorias")
+		except Exception as e:
+			print(f"Erro ao armazenar agregados: {e}")
+
+	async def get_supermarket_aggregates(self, supermarket: str) -> List[Dict]:
+		"""Obtém os agregados por categoria de um supermercado"""
+		try:
+			cursor = self.aggregates.find({"supermarket": supermarket}, {"_id": 0}).sort("category", 1)
+			return await cursor.to_list(length=100)
+		except Exception as e:
+			print(f"Erro ao obter agregados do supermercado: {e}")
+			return []
+
+	async def get_category_leaderboard(self, category: str, order_by: str = "median_price") -> List[Dict]:
+		"""Obtém os supermercados de uma categoria ordenados pelo campo informado"""
+		try:
+			direction = -1 if order_by == "promotion_share" else 1
+			cursor = self.aggregates.find({"category": category}, {"_id": 0}).sort(order_by, direction)
+			return await cursor.to_list(length=100)
+		except Exception as e:
+			print(f"Erro ao obter ranking da categoria: {e}")
+			return []
+
+	async def search_products(self, product_name: str, brand: Optional[str] = None,
+			sort_by: str = "price") -> List[Dict]:
+		"""
+		Busca produtos por nome e marca opcional, ordenados por preço
+		ou por preço unitário. No segundo caso, produtos sem quantidade
+		conhecida vêm depois dos demais, ordenados por preço.
+		"""
 		try:
 			# Cria query de busca
 			query = {
@@ -49,8 +214,19 @@ class MongoService:
 			if brand:
 				query["brand"] = {"$regex": brand, "$options": "i"}
 
-			cursor = self.products.find(query)
-			products = await cursor.to_list(length=100)
+			if sort_by == "unit_price":
+				# O MongoDB ordena nulos primeiro: duas consultas indexadas
+				# mantêm as ofertas sem preço unitário no fim da lista
+				products = await self.products.find(
+					{**query, "unit_price": {"$type": "number"}}
+				).sort("unit_price", 1).to_list(length=100)
+				if len(products) < 100:
+					products += await self.products.find(
+						{**query, "unit_price": None}
+					).sort("price", 1).to_list(length=100 - len(products))
+			else:
+				cursor = self.products.find(query).sort(sort_by, 1)
+				products = await cursor.to_list(length=100)
 
 			# Converte ObjectId para string para serialização
 			for product in products:
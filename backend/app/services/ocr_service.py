@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+def _remaining(deadline: float) -> float:
+	"""Tempo restante até o prazo do documento (relógio de parede, válido entre processos)"""
+	remaining = deadline - time.time()
+	if remaining <= 0:
+		raise TimeoutError("prazo do documento esgotado")
+	return remaining
+
+def _render_page(pdf_path: str, page_index: int, resolution: int, deadline: float) -> bytes:
+	"""
+	Rasteriza apenas a página informada como PNG (roda no pool de processos)
+	"""
+	import pypdfium2 as pdfium
+
+	_remaining(deadline)
+	pdf = pdfium.PdfDocument(pdf_path)
+	try:
+		image = pdf[page_index].render(scale=resolution / 72).to_pil()
+	finally:
+		pdf.close()
+
+	buffer = io.BytesIO()
+	image.save(buffer, format="PNG")
+	return buffer.getvalue()
+
+def _run_tesseract(image_bytes: bytes, lang: str, deadline: float) -> str:
+	"""
+	Executa o Tesseract sobre a imagem de uma página (roda no pool de processos).
+	O timeout encerra o processo do Tesseract ao fim do prazo, liberando o pool.
+	"""
+	import pytesseract
+	from PIL import Image
+
+	with Image.open(io.BytesIO(image_bytes)) as image:
+		return pytesseract.image_to_string(image, lang=lang, timeout=_remaining(deadline))
+
+class OCRService:
+	def __init__(self):
+		self.max_workers = int(os.getenv("OCR_WORKERS", 2))
+		self.lang = os.getenv("OCR_LANG", "por")
+		self.resolution = int(os.getenv("OCR_RESOLUTION", 300))
+		self.time_budget = float(os.getenv("OCR_TIME_BUDGET", 60))
+		self.cache_size = int(os.getenv("OCR_CACHE_SIZE", 256))
+		self.cache: "OrderedDict[str, str]" = OrderedDict()
+		self.executor = None
+		self.available = self._check_engine()
+
+	def _check_engine(self) -> bool:
+		"""Verifica se o Tesseract está instalado localmente"""
+		try:
+			import pytesseract
+			pytesseract.get_tesseract_version()
+			return True
+		except Exception as e:
+			print(f"OCR indisponível (Tesseract não encontrado): {e}")
+			return False
+
+	def _get_executor(self) -> ProcessPoolExecutor:
+		if self.executor is None:
+			# O pool é criado a partir de uma thread no meio do processamento:
+			# fork copiaria locks em estado inconsistente, então os workers
+			# partem de um processo limpo (forkserver, ou spawn onde não existe)
+			methods = multiprocessing.get_all_start_methods()
+			context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+			self.executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+		return self.executor
+
+	def close(self):
+		"""Encerra o pool de processos do OCR"""
+		if self.executor is not None:
+			self.executor.shutdown(wait=False, cancel_futures=True)
+			self.executor = None
+
+	def spool_pdf(self, pdf_content: bytes) -> str:
+		"""
+		Grava o PDF em arquivo temporário para os workers lerem só a página
+		de que precisam (evita serializar o documento inteiro por página)
+		"""
+		fd, path = tempfile.mkstemp(suffix=".pdf")
+		with os.fdopen(fd, "wb") as f:
+			f.write(pdf_content)
+		return path
+
+	def discard_pdf(self, path: Optional[str]):
+		if path and os.path.exists(path):
+			os.remove(path)
+
+	def _cache_get(self, key: str) -> Optional[str]:
+		text = self.cache.get(key)
+		if text is not None:
+			self.cache.move_to_end(key)
+		return text
+
+	def _cache_put(self, key: str, text: str):
+		self.cache[key] = text
+		self.cache.move_to_end(key)
+		while len(self.cache) > self.cache_size:
+			self.cache.popitem(last=False)
+
+	def submit(self, pdf_path: str, page_index: int, deadline: float) -> "asyncio.Future[str]":
+		"""
+		Agenda renderização e OCR de uma página no pool de processos.
+		Páginas cuja imagem já foi vista são respondidas do cache (hash do PNG).
+		"""
+		return asyncio.ensure_future(self._recognize(pdf_path, page_index, deadline))
+
+	async def _recognize(self, pdf_path: str, page_index: int, deadline: float) -> str:
+		loop = asyncio.get_running_loop()
+		executor = self._get_executor()
+		# Os workers não compartilham o relógio monotônico: converte para tempo de parede
+		wall_deadline = time.time() + (deadline - time.monotonic())
+
+		image_bytes = await loop.run_in_executor(
+			executor, _render_page, pdf_path, page_index, self.resolution, wall_deadline
+		)
+
+		key = hashlib.sha256(image_bytes).hexdigest()
+		cached = self._cache_get(key)
+		if cached is not None:
+			return cached
+
+		text = await loop.run_in_executor(executor, _run_tesseract, image_bytes, self.lang, wall_deadline)
+		self._cache_put(key, text)
+		return text
+
+	async def collect(self, futures: Dict[int, "asyncio.Future[str]"], deadline: float) -> Dict[int, str]:
+		"""
+		Aguarda os OCRs agendados (índice da página -> future) até o prazo
+		do documento. Páginas não concluídas a tempo ficam de fora.
+		"""
+		results = {}
+		if not futures:
+			return results
+
+		timeout = max(deadline - time.monotonic(), 0)
+		done, not_done = await asyncio.wait(futures.values(), timeout=timeout)
+
+		for page_num, future in futures.items():
+			if future in not_done:
+				future.cancel()
+				print(f"OCR: prazo do documento esgotado, página {page_num + 1} ignorada")
+				continue
+			try:
+				results[page_num] = future.result()
+			except Exception as e:
+				print(f"Erro no OCR da página {page_num + 1}: {e}")
+
+		return results
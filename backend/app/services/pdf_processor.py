@@ -1,38 +1,116 @@
-import pdfplumber
-import pandas as pd
-from typing import List, Dict
-import aiofiles
 import asyncio
+import io
+import re
+import time
+from typing import List, Dict
 
+from app.services.line_classifier import LineClassifier
+from app.services.ocr_service import OCRService
 from app.utils.helpers import (
 	clean_product_name,
 	extract_price,
 	is_product_line,
 	is_promotion_line,
-	categorize_product
+	categorize_product,
+	unit_price_fields
 )
 
 class PDFProcessor:
 	def __init__(self):
 		self.min_confidence = 0.6
+		self.ocr_service = OCRService()
+		self.line_classifier = LineClassifier.load_default()
+
+	def close(self):
+		self.ocr_service.close()
+
+	def count_pages(self, pdf_content: bytes) -> int:
+		"""
+		Conta as páginas sem extrair conteúdo (o pdfplumber carrega páginas sob demanda)
+		"""
+		import pdfplumber
+
+		with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
+			return len(pdf.pages)
 
 	async def process_pdf(self, pdf_content: bytes, supermarket: str = "supermercado") -> List[Dict]:
 		"""
-		Processa PDF content e extrai informações dos produtos
+		Processa PDF content e extrai informações dos produtos.
+		A leitura das páginas (CPU) roda fora do event loop, para não travar
+		as demais requisições do worker.
+		"""
+		loop = asyncio.get_running_loop()
+		ocr_futures = {}
+		spool = {}
+		deadline = time.monotonic() + self.ocr_service.time_budget
+
+		def on_image_page(page_num: int):
+			# Chamado pela thread de extração: o PDF vai para disco uma única
+			# vez e o OCR é agendado no event loop
+			if "path" not in spool:
+				spool["path"] = self.ocr_service.spool_pdf(pdf_content)
+			loop.call_soon_threadsafe(self._start_ocr, ocr_futures, spool["path"], page_num, deadline)
+
+		try:
+			products = await loop.run_in_executor(
+				None, self._extract_pages, pdf_content, supermarket, deadline, on_image_page
+			)
+
+			# Estratégia 3: texto reconhecido por OCR nas páginas escaneadas
+			ocr_texts = await self.ocr_service.collect(ocr_futures, deadline)
+		finally:
+			self.ocr_service.discard_pdf(spool.get("path"))
+
+		for page_num in sorted(ocr_texts):
+			ocr_products = await loop.run_in_executor(
+				None, self._extract_from_text_content, ocr_texts[page_num], supermarket
+			)
+			products.extend(ocr_products)
+			print(f"Página {page_num + 1} (OCR): {len(ocr_products)} produtos encontrados")
+
+		# Remove duplicatas e produtos inválidos
+		valid_products = self._filter_valid_products(products)
+		print(f"Total de produtos válidos encontrados: {len(valid_products)}")
+
+		return valid_products
+
+	def _start_ocr(self, ocr_futures: Dict, pdf_path: str, page_num: int, deadline: float):
+		ocr_futures[page_num] = self.ocr_service.submit(pdf_path, page_num, deadline)
+		print(f"Página {page_num + 1}: sem texto, enviada para OCR")
+
+	def _extract_pages(self, pdf_content: bytes, supermarket: str, deadline: float, on_image_page) -> List[Dict]:
+		"""
+		Extrai produtos das páginas com camada de texto. Páginas escaneadas
+		são repassadas para on_image_page (OCR).
 		"""
+		# Importado sob demanda: pdfplumber (e pdfminer) pesam no cold start
+		# e só são necessários em quem processa uploads
+		import pdfplumber
+
 		products = []
 
 		try:
-			with pdfplumber.open(pdf_content) as pdf:
+			with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
 				for page_num, page in enumerate(pdf.pages):
 					print(f"Processando página {page_num + 1}...")
 
+					# Páginas escaneadas não têm camada de texto: vão para o OCR,
+					# que roda em paralelo enquanto as demais páginas são lidas
+					if self._is_image_only(page):
+						if not self.ocr_service.available:
+							print(f"Página {page_num + 1}: sem texto e OCR indisponível, ignorada")
+						elif time.monotonic() >= deadline:
+							print(f"Página {page_num + 1}: sem texto e prazo de OCR esgotado, ignorada")
+						else:
+							on_image_page(page_num)
+						continue
+
 					# Estratégia 1: Tenta extrair tabelas
-					table_products = await self._extract_from_tables(page, supermarket)
+					table_products = self._extract_from_tables(page, supermarket)
 					products.extend(table_products)
 
 					# Estratégia 2: Extrai do texto
-					text_products = await self._extract_from_text(page, supermarket)
+					text_products = self._extract_from_text(page, supermarket)
 					products.extend(text_products)
 
 					print(f"Página {page_num + 1}: {len(table_products) + len(text_products)} produtos encontrados")
@@ -41,20 +119,16 @@ class PDFProcessor:
 			print(f"Erro ao processar PDF: {e}")
 			# Fallback: tenta processar apenas o texto
 			try:
-				with pdfplumber.open(pdf_content) as pdf:
+				with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
 					for page in pdf.pages:
-						text_products = await self._extract_from_text(page, supermarket)
+						text_products = self._extract_from_text(page, supermarket)
 						products.extend(text_products)
 			except Exception as fallback_error:
 				print(f"Erro no fallback: {fallback_error}")
 
-		# Remove duplicatas e produtos inválidos
-		valid_products = self._filter_valid_products(products)
-		print(f"Total de produtos válidos encontrados: {len(valid_products)}")
-
-		return valid_products
+		return products
 
-	async def _extract_from_tables(self, page, supermarket: str) -> List[Dict]:
+	def _extract_from_tables(self, page, supermarket: str) -> List[Dict]:
 		"""
 		Extrai produtos de tabelas detectadas no PDF
 		"""
@@ -74,7 +148,7 @@ class PDFProcessor:
 					row_text = ' '.join([str(cell) if cell else '' for cell in row])
 
 					# Tenta encontrar produto e preço na linha
-					product_info = await self._extract_product_from_line(row_text, supermarket)
+					product_info = self._extract_product_from_line(row_text, supermarket)
 					if product_info:
 						products.append(product_info)
 
@@ -100,7 +174,9 @@ class PDFProcessor:
 										'price': price,
 										'supermarket': supermarket,
 										'promotion': is_promotion_line(row_text),
-										'category': categorize_product(product_name)
+										'category': categorize_product(product_name),
+										# Quantidade pode estar em coluna própria antes do preço
+										**unit_price_fields(price, ' '.join(str(cell) for cell in row[:i] if cell))
 									})
 								break
 
@@ -109,25 +185,37 @@ class PDFProcessor:
 
 		return products
 
-	async def _extract_from_text(self, page, supermarket: str) -> List[Dict]:
+	def _extract_from_text(self, page, supermarket: str) -> List[Dict]:
 		"""
 		Extrai produtos do texto da página
 		"""
+		try:
+			text = page.extract_text()
+		except Exception as e:
+			print(f"Erro ao extrair do texto: {e}")
+			return []
+
+		return self._extract_from_text_content(text, supermarket)
+
+	def _extract_from_text_content(self, text: str, supermarket: str) -> List[Dict]:
+		"""
+		Extrai produtos de um texto já extraído (camada de texto ou OCR)
+		"""
 		products = []
 
 		try:
-			text = page.extract_text()
 			if not text:
 				return products
 
-			lines = text.split('\n')
+			lines = [line.strip() for line in text.split('\n')]
+			candidates = self._classify_lines(lines)
 			i = 0
 
 			while i < len(lines):
-				line = lines[i].strip()
+				line = lines[i]
 
-				if is_product_line(line):
-					product_info = await self._extract_product_from_line(line, supermarket)
+				if candidates[i]:
+					product_info = self._extract_product_from_line(line, supermarket)
 
 					if product_info:
 						products.append(product_info)
@@ -135,8 +223,8 @@ class PDFProcessor:
 					else:
 						# Se não encontrou produto completo, tenta com próxima linha
 						if i + 1 < len(lines):
-							combined_line = line + " " + lines[i + 1].strip()
-							combined_product_info = await self._extract_product_from_line(combined_line, supermarket)
+							combined_line = line + " " + lines[i + 1]
+							combined_product_info = self._extract_product_from_line(combined_line, supermarket)
 
 							if combined_product_info:
 								products.append(combined_product_info)
@@ -153,7 +241,22 @@ class PDFProcessor:
 
 		return products
 
-	async def _extract_product_from_line(self, line: str, supermarket: str) -> Dict:
+	def _classify_lines(self, lines: List[str]) -> List[bool]:
+		"""
+		Marca as linhas candidatas a produto. Com modelo treinado, a página
+		inteira é pontuada de uma vez; sem modelo, usa a heurística por linha.
+		"""
+		if self.line_classifier is not None:
+			return self.line_classifier.predict(lines).tolist()
+		return [is_product_line(line) for line in lines]
+
+	def _is_image_only(self, page) -> bool:
+		"""
+		Verifica se a página não possui camada de texto (ex.: encarte escaneado)
+		"""
+		return not page.chars and bool(page.images)
+
+	def _extract_product_from_line(self, line: str, supermarket: str) -> Dict:
 		"""
 		Extrai informações do produto de uma linha de texto
 		"""
@@ -186,7 +289,9 @@ class PDFProcessor:
 				'price': price,
 				'supermarket': supermarket,
 				'promotion': is_promotion_line(line),
-				'category': categorize_product(product_name)
+				'category': categorize_product(product_name),
+				# Quantidade lida da linha original, sem o trecho do preço
+				**unit_price_fields(price, line)
 			}
 
 		except Exception as e:
@@ -1,18 +1,20 @@
+from collections import Counter
 from typing import List, Dict, Optional
 from app.models import ShoppingItem
 from app.services.mongo_service import MongoService
 
 class PriceComparator:
-    def __init__(self):
-        self.mongo_service = MongoService()
+    def __init__(self, mongo_service: Optional[MongoService] = None):
+        # Reaproveita o cliente do chamador para não abrir um segundo pool
+        self.mongo_service = mongo_service or MongoService()
     
-    async def find_best_prices(self, item: ShoppingItem) -> List[Dict]:
+    async def find_best_prices(self, item: ShoppingItem, rank_by: str = "price") -> List[Dict]:
         """
         Encontra preços para um item específico em todos os supermercados
         """
         try:
             # Busca produtos similares no banco
-            products = await self.mongo_service.search_products(item.name, item.brand)
+            products = await self.mongo_service.search_products(item.name, item.brand, rank_by)
             
             results = []
             for product in products:
@@ -21,6 +23,8 @@ class PriceComparator:
                     'product_name': product['name'],
                     'price': float(product['price']),
                     'promotion': product.get('promotion', False),
+                    'unit': product.get('unit'),
+                    'unit_price': product.get('unit_price'),
                     'found': True
                 })
             
@@ -40,9 +44,10 @@ class PriceComparator:
             print(f"Erro ao buscar melhores preços: {e}")
             return []
     
-    def get_best_option(self, results: List[Dict]) -> Optional[Dict]:
+    def get_best_option(self, results: List[Dict], rank_by: str = "price") -> Optional[Dict]:
         """
-        Obtém a melhor opção de preço dos resultados
+        Obtém a melhor opção de preço dos resultados. Com rank_by="unit_price",
+        compara apenas ofertas na unidade mais comum (kg, l ou un).
         """
         if not results:
             return None
@@ -52,19 +57,26 @@ class PriceComparator:
         if not valid_results:
             return None
         
+        if rank_by == "unit_price":
+            priced = [r for r in valid_results if r.get('unit_price') is not None]
+            if priced:
+                unit = Counter(r['unit'] for r in priced).most_common(1)[0][0]
+                comparable = [r for r in priced if r['unit'] == unit]
+                return min(comparable, key=lambda x: x['unit_price'])
+        
         # Ordena por preço e retorna o mais barato
         best_option = min(valid_results, key=lambda x: x['price'])
         return best_option
     
-    async def compare_shopping_list(self, shopping_list: List[ShoppingItem]) -> List[Dict]:
+    async def compare_shopping_list(self, shopping_list: List[ShoppingItem], rank_by: str = "price") -> List[Dict]:
         """
         Compara preços para uma lista de compras completa
         """
         comparison_results = []
         
         for item in shopping_list:
-            results = await self.find_best_prices(item)
-            best_option = self.get_best_option(results)
+            results = await self.find_best_prices(item, rank_by)
+            best_option = self.get_best_option(results, rank_by)
             
             # Usar item.dict() para versões mais recentes do Pydantic
             # ou item.model_dump() para versões mais antigas
@@ -1,5 +1,30 @@
 import re
-from typing import List
+from typing import List, Optional, Tuple
+
+# Fatores para normalizar quantidades em kg, l ou un
+UNIT_FACTORS = {
+	'kg': ('kg', 1.0), 'kilo': ('kg', 1.0), 'quilo': ('kg', 1.0),
+	'g': ('kg', 0.001), 'gr': ('kg', 0.001), 'grs': ('kg', 0.001), 'gramas': ('kg', 0.001),
+	'l': ('l', 1.0), 'lt': ('l', 1.0), 'lts': ('l', 1.0), 'litro': ('l', 1.0), 'litros': ('l', 1.0),
+	'ml': ('l', 0.001),
+	'un': ('un', 1.0), 'und': ('un', 1.0), 'unid': ('un', 1.0), 'unidades': ('un', 1.0)
+}
+
+_UNIT_PATTERN = '|'.join(sorted(UNIT_FACTORS, key=len, reverse=True))
+_NUMBER_PATTERN = r'\d+(?:[.,]\d+)?'
+_MULTIPACK_RE = re.compile(
+	rf'\b(\d+)\s*x\s*({_NUMBER_PATTERN})\s*({_UNIT_PATTERN})\b', re.IGNORECASE
+)
+_QUANTITY_RE = re.compile(rf'\b({_NUMBER_PATTERN})\s*({_UNIT_PATTERN})\b', re.IGNORECASE)
+# Preço já expresso por unidade: "R$ 39,90 o kg", "R$ 5,99/kg", "R$ 4,99 kg", "kg 6,99"
+_PER_UNIT_UNITS = r'(kg|kilo|quilo|l|litro|un|unid)'
+_PRICE_PATTERN = r'(?:R\$\s*)?\d+(?:\.\d{3})*[.,]\d{2}'
+_PER_UNIT_RE = re.compile(
+	rf'(?:/\s*|\bo\s+|\bpor\s+){_PER_UNIT_UNITS}\b'
+	rf'|{_PRICE_PATTERN}\s*{_PER_UNIT_UNITS}\b'
+	rf'|\b{_PER_UNIT_UNITS}\.?\s*{_PRICE_PATTERN}',
+	re.IGNORECASE
+)
 
 def clean_product_name(name: str) -> str:
 	"""
@@ -38,6 +63,14 @@ def extract_price(text: str) -> float:
 	"""
 	Extrai preço do texto usando múltiplos padrões
 	"""
+	match = extract_price_span(text)
+	return match[0] if match else None
+
+def extract_price_span(text: str) -> Optional[Tuple[float, int, int]]:
+	"""
+	Extrai o preço e a posição (início, fim) do trecho que o contém,
+	incluindo o "R$" quando presente
+	"""
 	if not text:
 		return None
 
@@ -54,10 +87,10 @@ def extract_price(text: str) -> float:
 	]
 
 	for pattern in price_patterns:
-		matches = re.findall(pattern, text)
-		if matches:
+		match = re.search(pattern, text)
+		if match:
 			try:
-				price_str = matches[0]
+				price_str = match.group(1)
 				# Remove pontos de milhar e converte decimal
 				if '.' in price_str and ',' in price_str:
 					# Formato 1.999,99 -> remove ponto, substitui vírgula
@@ -70,13 +103,72 @@ def extract_price(text: str) -> float:
 
 				# Validação: preço deve ser razoável (entre 0.01 e 9999.99)
 				if 0.01 <= price <= 9999.99:
-					return price
+					return price, match.start(), match.end()
 
 			except (ValueError, IndexError):
 				continue
 
 	return None
 
+def extract_quantity(text: str, price_span: Tuple[int, int] = None) -> Optional[Tuple[float, str]]:
+	"""
+	Extrai a quantidade do texto normalizada para kg, l ou un
+	(ex.: "5kg" -> (5.0, 'kg'), "6x350ml" -> (2.1, 'l')).
+	Com price_span, a embalagem é procurada fora do trecho do preço, para
+	que "R$ 4,99 kg" não seja lido como 4,99 kg.
+	"""
+	if not text:
+		return None
+
+	package_text = text
+	if price_span:
+		start, end = price_span
+		package_text = f"{text[:start]} {text[end:]}"
+
+	count = 1
+	match = _MULTIPACK_RE.search(package_text)
+	if match:
+		count = int(match.group(1))
+		amount, unit = match.group(2), match.group(3)
+	else:
+		match = _QUANTITY_RE.search(package_text)
+		if match:
+			amount, unit = match.group(1), match.group(2)
+		else:
+			match = _PER_UNIT_RE.search(text)
+			if not match:
+				return None
+			amount, unit = '1', next(group for group in match.groups() if group)
+
+	try:
+		base_unit, factor = UNIT_FACTORS[unit.lower()]
+		quantity = count * float(amount.replace(',', '.')) * factor
+	except (KeyError, ValueError):
+		return None
+
+	if quantity <= 0:
+		return None
+
+	return round(quantity, 6), base_unit
+
+def unit_price_fields(price: float, text: str) -> dict:
+	"""
+	Calcula os campos de preço unitário (por kg, l ou un) de um produto.
+	`text` pode ser a linha original: o trecho do preço é desconsiderado
+	na leitura da embalagem.
+	"""
+	price_match = extract_price_span(text)
+	quantity = extract_quantity(text, price_match[1:] if price_match else None)
+	if not quantity or not price:
+		return {'quantity': None, 'unit': None, 'unit_price': None}
+
+	amount, unit = quantity
+	return {
+		'quantity': amount,
+		'unit': unit,
+		'unit_price': round(price / amount, 4)
+	}
+
 def is_product_line(line: str) -> bool:
 	"""
 	Verifica se a linha parece conter um produto
@@ -0,0 +1,194 @@
+"""
+Harness de regressão de extração: roda PDFProcessor.process_pdf sobre
+encartes sintéticos (benchmarks.flyer_generator) e mede precisão,
+recall, páginas/s e pico de memória por cenário.
+
+Precisão e recall são determinísticos e formam o gate obrigatório:
+são comparados com benchmarks/extraction_baseline.json e o processo
+termina com código 1 se algum deles regredir além da tolerância.
+
+Páginas/s e pico de memória dependem da máquina e só são verificados
+quando pedido, contra números gravados na mesma máquina:
+
+    python -m benchmarks.extraction_regression
+    python -m benchmarks.extraction_regression --update-baseline
+
+    git stash && python -m benchmarks.extraction_regression --save-perf /tmp/perf.json
+    git stash pop && python -m benchmarks.extraction_regression --perf-baseline /tmp/perf.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+from app.services.pdf_processor import PDFProcessor
+from app.utils.helpers import clean_product_name
+from benchmarks.flyer_generator import LAYOUTS, generate_flyer
+
+ACCURACY_METRICS = ("pages", "products_expected", "products_extracted", "precision", "recall")
+PERF_METRICS = ("pages_per_sec", "peak_memory_mb")
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "extraction_baseline.json")
+
+SCENARIOS = {
+	"table": {"layouts": ("table",), "pages": 6, "seed": 11},
+	"columns": {"layouts": ("columns",), "pages": 6, "seed": 12},
+	"split": {"layouts": ("split",), "pages": 6, "seed": 13},
+	"mixed": {"layouts": LAYOUTS, "pages": 12, "seed": 14},
+}
+
+def _tokens(name: str) -> set:
+	return set(clean_product_name(name).lower().split())
+
+def match_products(extracted: List[Dict], truth: List[Dict], min_overlap: float = 0.5) -> int:
+	"""
+	Conta os produtos extraídos que correspondem ao gabarito: mesmo preço
+	e nomes com sobreposição de tokens (Jaccard) acima de min_overlap.
+	Cada item do gabarito casa no máximo uma vez.
+	"""
+	remaining: Dict[float, List[set]] = {}
+	for item in truth:
+		remaining.setdefault(round(item["price"], 2), []).append(_tokens(item["name"]))
+
+	matched = 0
+	for product in extracted:
+		candidates = remaining.get(round(product["price"], 2), [])
+		tokens = _tokens(product["name"])
+		for index, expected in enumerate(candidates):
+			union = tokens | expected
+			if union and len(tokens & expected) / len(union) >= min_overlap:
+				matched += 1
+				del candidates[index]
+				break
+
+	return matched
+
+def run_scenario(processor: PDFProcessor, config: Dict, repeat: int) -> Dict:
+	pdf, truth = generate_flyer(config["pages"], config["seed"], config["layouts"])
+	timings = []
+	peak = 0
+	products = []
+
+	for _ in range(repeat):
+		tracemalloc.start()
+		start = time.perf_counter()
+		with contextlib.redirect_stdout(io.StringIO()):
+			products = asyncio.run(processor.process_pdf(pdf, "sintetico"))
+		timings.append(time.perf_counter() - start)
+		peak = max(peak, tracemalloc.get_traced_memory()[1])
+		tracemalloc.stop()
+
+	matched = match_products(products, truth)
+	return {
+		"pages": config["pages"],
+		"products_expected": len(truth),
+		"products_extracted": len(products),
+		"precision": round(matched / max(len(products), 1), 4),
+		"recall": round(matched / max(len(truth), 1), 4),
+		"pages_per_sec": round(config["pages"] / statistics.median(timings), 2),
+		"peak_memory_mb": round(peak / (1024 * 1024), 2)
+	}
+
+def find_accuracy_regressions(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+	regressions = []
+	for name, result in results.items():
+		expected = baseline.get(name)
+		if not expected:
+			continue
+
+		for metric in ("precision", "recall"):
+			if result[metric] < expected[metric] - tolerance:
+				regressions.append(f"{name}: {metric} {expected[metric]} -> {result[metric]}")
+
+	return regressions
+
+def find_perf_regressions(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+	regressions = []
+	for name, result in results.items():
+		expected = baseline.get(name)
+		if not expected:
+			continue
+
+		if result["pages_per_sec"] < expected["pages_per_sec"] * (1 - tolerance):
+			regressions.append(
+				f"{name}: pages_per_sec {expected['pages_per_sec']} -> {result['pages_per_sec']}"
+			)
+		if result["peak_memory_mb"] > expected["peak_memory_mb"] * (1 + tolerance):
+			regressions.append(
+				f"{name}: peak_memory_mb {expected['peak_memory_mb']} -> {result['peak_memory_mb']}"
+			)
+
+	return regressions
+
+def _select(results: Dict, metrics) -> Dict:
+	return {name: {metric: result[metric] for metric in metrics} for name, result in results.items()}
+
+def _write_json(path: str, data: Dict):
+	with open(path, "w", encoding="utf-8") as f:
+		json.dump(data, f, indent=2)
+		f.write("\n")
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+	parser.add_argument("--repeat", type=int, default=3)
+	parser.add_argument("--baseline", default=BASELINE_PATH)
+	parser.add_argument("--update-baseline", action="store_true")
+	parser.add_argument("--accuracy-tolerance", type=float, default=0.01,
+		help="Queda absoluta máxima de precisão/recall")
+	parser.add_argument("--perf-tolerance", type=float, default=0.25,
+		help="Variação relativa máxima de páginas/s e pico de memória")
+	parser.add_argument("--save-perf", metavar="ARQUIVO",
+		help="Grava páginas/s e pico de memória desta execução (referência local)")
+	parser.add_argument("--perf-baseline", metavar="ARQUIVO",
+		help="Também falha se páginas/s ou memória piorarem em relação a este arquivo")
+	args = parser.parse_args()
+
+	with contextlib.redirect_stdout(io.StringIO()):
+		processor = PDFProcessor()
+
+	results = {}
+	for name in args.scenarios:
+		results[name] = run_scenario(processor, SCENARIOS[name], args.repeat)
+		print(json.dumps({"scenario": name, **results[name]}, ensure_ascii=False))
+
+	if args.save_perf:
+		_write_json(args.save_perf, _select(results, PERF_METRICS))
+		print(f"Referência de desempenho gravada em {args.save_perf}")
+
+	if args.update_baseline:
+		_write_json(args.baseline, _select(results, ACCURACY_METRICS))
+		print(f"Baseline atualizado em {args.baseline}")
+		return
+
+	if not os.path.exists(args.baseline):
+		print(f"Baseline não encontrado em {args.baseline}; rode com --update-baseline")
+		sys.exit(1)
+
+	with open(args.baseline, encoding="utf-8") as f:
+		baseline = json.load(f)
+
+	regressions = find_accuracy_regressions(results, baseline, args.accuracy_tolerance)
+
+	if args.perf_baseline:
+		with open(args.perf_baseline, encoding="utf-8") as f:
+			perf_baseline = json.load(f)
+		regressions += find_perf_regressions(results, perf_baseline, args.perf_tolerance)
+
+	if regressions:
+		print("Regressões encontradas:")
+		for regression in regressions:
+			print(f"  {regression}")
+		sys.exit(1)
+
+	print("Sem regressões em relação ao baseline")
+
+if __name__ == "__main__":
+	main()
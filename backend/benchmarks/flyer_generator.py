@@ -0,0 +1,204 @@
+"""
+Gerador determinístico de encartes sintéticos com gabarito.
+
+Produz PDFs (sem dependências externas) com os layouts mais comuns em
+encartes de supermercado:
+
+- table: tabela com bordas (produto | embalagem | preço)
+- columns: texto em duas ou três colunas, produto e preço na mesma linha
+- split: nome do produto em uma linha e o preço na linha seguinte
+
+Uso:
+
+    python -m benchmarks.flyer_generator --pages 4 --seed 7 --output encarte.pdf
+"""
+import argparse
+import json
+import random
+from typing import Dict, List, Tuple
+
+LAYOUTS = ("table", "columns", "split")
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 40
+
+PRODUCTS = [
+	"Arroz Tio João", "Arroz Camil", "Feijão Carioca Kicaldo", "Feijão Preto Camil",
+	"Açúcar Refinado União", "Café Pilão", "Café Melitta", "Óleo de Soja Liza",
+	"Macarrão Espaguete Renata", "Molho de Tomate Pomarola", "Farinha de Trigo Dona Benta",
+	"Leite Integral Italac", "Queijo Mussarela Tirolez", "Manteiga Aviação",
+	"Iogurte Natural Nestlé", "Requeijão Catupiry", "Refrigerante Coca Cola",
+	"Suco de Uva Aurora", "Água Mineral Crystal", "Cerveja Heineken",
+	"Detergente Ypê", "Sabão em Pó Omo", "Amaciante Comfort", "Desinfetante Pinho Sol",
+	"Papel Higiênico Neve", "Sabonete Dove", "Shampoo Seda", "Creme Dental Colgate",
+	"Frango Inteiro Sadia", "Picanha Bovina Friboi", "Linguiça Toscana Perdigão",
+	"Banana Prata", "Tomate Italiano", "Batata Inglesa", "Biscoito Recheado Oreo",
+	"Pão de Forma Pullman", "Bolacha Cream Cracker Vitarella", "Extrato de Tomate Elefante"
+]
+
+SIZES = ["1kg", "5kg", "500g", "1L", "2L", "350ml", "6x350ml", "200g", "12 un", "900ml"]
+
+HEADERS = ["OFERTAS DA SEMANA", "Validade: 10/10 a 16/10", "Confira nossas promoções",
+	"Imagens meramente ilustrativas"]
+
+def format_brl(price: float, style: int) -> str:
+	"""Formata o preço em um dos estilos encontrados nos encartes"""
+	integer, cents = f"{price:.2f}".split(".")
+	if len(integer) > 3:
+		integer = f"{integer[:-3]}.{integer[-3:]}"
+	value = f"{integer},{cents}"
+	return [f"R$ {value}", f"R${value}", value, f"{value} R$"][style % 4]
+
+def _escape(text: str) -> str:
+	return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def _text(x: float, y: float, text: str, size: int = 10) -> str:
+	return f"BT /F1 {size} Tf {x:.1f} {y:.1f} Td ({_escape(text)}) Tj ET"
+
+def _line(x1: float, y1: float, x2: float, y2: float) -> str:
+	return f"{x1:.1f} {y1:.1f} m {x2:.1f} {y2:.1f} l S"
+
+def build_pdf(pages: List[List[str]]) -> bytes:
+	"""
+	Monta um PDF mínimo: uma fonte Helvetica (WinAnsi) e um content
+	stream por página
+	"""
+	objects = [
+		b"<< /Type /Catalog /Pages 2 0 R >>",
+		None,  # Pages, preenchido após conhecer os filhos
+		b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+	]
+	kids = []
+
+	for operations in pages:
+		stream = "\n".join(operations).encode("cp1252")
+		objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+		content_id = len(objects)
+		objects.append((
+			"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+			"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+			% (PAGE_WIDTH, PAGE_HEIGHT, content_id)
+		).encode())
+		kids.append(len(objects))
+
+	objects[1] = ("<< /Type /Pages /Kids [%s] /Count %d >>" % (
+		" ".join(f"{kid} 0 R" for kid in kids), len(kids)
+	)).encode()
+
+	output = bytearray(b"%PDF-1.4\n")
+	offsets = []
+	for number, body in enumerate(objects, start=1):
+		offsets.append(len(output))
+		output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+
+	xref = len(output)
+	output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+	for offset in offsets:
+		output += b"%010d 00000 n \n" % offset
+	output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+	return bytes(output)
+
+def _random_item(rng: random.Random) -> Tuple[str, str, float]:
+	name = rng.choice(PRODUCTS)
+	size = rng.choice(SIZES)
+	price = round(rng.uniform(1.5, 150.0), 2) if rng.random() > 0.05 else round(rng.uniform(1000, 2500), 2)
+	return name, size, price
+
+def _page_header(rng: random.Random, operations: List[str]) -> float:
+	y = PAGE_HEIGHT - MARGIN
+	for header in rng.sample(HEADERS, 2):
+		operations.append(_text(MARGIN, y, header, 14))
+		y -= 22
+	return y - 10
+
+def _table_page(rng: random.Random, truth: List[Dict]) -> List[str]:
+	operations = []
+	top = _page_header(rng, operations)
+	columns = [MARGIN, 330, 430, PAGE_WIDTH - MARGIN]
+	row_height = 22
+	rows = rng.randint(12, 25)
+
+	for row in range(rows + 1):
+		y = top - row * row_height
+		operations.append(_line(columns[0], y, columns[-1], y))
+	for x in columns:
+		operations.append(_line(x, top, x, top - rows * row_height))
+
+	for row in range(rows):
+		name, size, price = _random_item(rng)
+		y = top - (row + 1) * row_height + 7
+		operations.append(_text(columns[0] + 4, y, name))
+		operations.append(_text(columns[1] + 4, y, size))
+		operations.append(_text(columns[2] + 4, y, format_brl(price, rng.randrange(4))))
+		truth.append({"name": name, "size": size, "price": price, "layout": "table"})
+
+	return operations
+
+def _columns_page(rng: random.Random, truth: List[Dict]) -> List[str]:
+	operations = []
+	top = _page_header(rng, operations)
+	column_count = rng.choice([2, 3])
+	column_width = (PAGE_WIDTH - 2 * MARGIN) / column_count
+	size = 8 if column_count == 3 else 9
+
+	for column in range(column_count):
+		x = MARGIN + column * column_width
+		y = top
+		for _ in range(rng.randint(15, 30)):
+			name, pack, price = _random_item(rng)
+			operations.append(_text(x, y, f"{name} {pack} {format_brl(price, rng.randrange(4))}", size))
+			truth.append({"name": name, "size": pack, "price": price, "layout": "columns"})
+			y -= 20
+
+	return operations
+
+def _split_page(rng: random.Random, truth: List[Dict]) -> List[str]:
+	operations = []
+	y = _page_header(rng, operations)
+
+	for _ in range(rng.randint(10, 16)):
+		name, size, price = _random_item(rng)
+		operations.append(_text(MARGIN, y, f"{name} {size}", 11))
+		operations.append(_text(MARGIN, y - 16, format_brl(price, rng.choice([0, 1, 3])), 16))
+		truth.append({"name": name, "size": size, "price": price, "layout": "split"})
+		y -= 44
+
+	return operations
+
+_PAGE_BUILDERS = {"table": _table_page, "columns": _columns_page, "split": _split_page}
+
+def generate_flyer(pages: int = 4, seed: int = 0, layouts=LAYOUTS) -> Tuple[bytes, List[Dict]]:
+	"""
+	Gera um encarte sintético. Retorna o PDF e o gabarito com nome,
+	embalagem, preço e layout de cada produto impresso.
+	"""
+	rng = random.Random(seed)
+	truth: List[Dict] = []
+	page_operations = []
+
+	for page in range(pages):
+		layout = layouts[page % len(layouts)]
+		page_operations.append(_PAGE_BUILDERS[layout](rng, truth))
+
+	return build_pdf(page_operations), truth
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--pages", type=int, default=4)
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--layouts", nargs="+", choices=LAYOUTS, default=list(LAYOUTS))
+	parser.add_argument("--output", default="encarte_sintetico.pdf")
+	args = parser.parse_args()
+
+	pdf, truth = generate_flyer(args.pages, args.seed, args.layouts)
+	with open(args.output, "wb") as f:
+		f.write(pdf)
+	with open(args.output.rsplit(".", 1)[0] + ".json", "w", encoding="utf-8") as f:
+		json.dump(truth, f, ensure_ascii=False, indent=2)
+
+	print(f"{args.output}: {args.pages} páginas, {len(truth)} produtos")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,93 @@
+"""
+Mede o tempo de importação de app.main em cada modo de execução e,
+no modo "full", o custo do primeiro upload (construção do PDFProcessor
+e processamento de um encarte sintético de uma página), que é onde a
+importação da pilha de extração passou a acontecer.
+
+Cada medição roda em um processo novo (cold start real). Uso:
+
+    python -m benchmarks.import_time --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que não devem ser carregados no modo "api"
+HEAVY_MODULES = ["pdfplumber", "pdfminer", "numpy", "pandas", "aiofiles"]
+
+PROBE = """
+import asyncio, json, os, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+heavy = [m for m in %r if m in sys.modules]
+
+first_upload = None
+if app.main.PDF_PROCESSING_ENABLED:
+    from benchmarks.flyer_generator import generate_flyer
+    pdf, _ = generate_flyer(pages=1, seed=0)
+    start = time.perf_counter()
+    processor = app.main.get_pdf_processor()
+    asyncio.run(processor.process_pdf(pdf, "sintetico"))
+    first_upload = time.perf_counter() - start
+    processor.close()
+
+print(json.dumps({"seconds": elapsed, "heavy_modules": heavy, "first_upload_seconds": first_upload}))
+""" % (HEAVY_MODULES,)
+
+def _ms_stats(prefix: str, samples: list) -> dict:
+	if not samples:
+		return {}
+	return {
+		f"{prefix}median_ms": round(statistics.median(samples) * 1000, 1),
+		f"{prefix}min_ms": round(min(samples) * 1000, 1),
+		f"{prefix}max_ms": round(max(samples) * 1000, 1)
+	}
+
+def measure(mode: str, runs: int) -> dict:
+	env = dict(os.environ, APP_MODE=mode)
+	samples = []
+	upload_samples = []
+	heavy = []
+
+	for _ in range(runs):
+		output = subprocess.check_output(
+			[sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env
+		)
+		result = json.loads(output.decode().strip().splitlines()[-1])
+		samples.append(result["seconds"])
+		if result["first_upload_seconds"] is not None:
+			upload_samples.append(result["first_upload_seconds"])
+		heavy = result["heavy_modules"]
+
+	return {
+		"mode": mode,
+		"runs": runs,
+		**_ms_stats("import_", samples),
+		**_ms_stats("first_upload_", upload_samples),
+		"heavy_modules": heavy
+	}
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument("--runs", type=int, default=5)
+	parser.add_argument("--modes", nargs="+", default=["api", "full"])
+	args = parser.parse_args()
+
+	failed = False
+	for mode in args.modes:
+		report = measure(mode, args.runs)
+		print(json.dumps(report))
+		if mode == "api" and report["heavy_modules"]:
+			print(f"Modo api importou módulos pesados: {report['heavy_modules']}")
+			failed = True
+
+	sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+	main()
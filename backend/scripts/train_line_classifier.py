@@ -0,0 +1,197 @@
+"""
+Treina o classificador de linhas a partir de encartes rotulados.
+
+Entrada: JSONL com uma linha de encarte por registro, no formato
+{"text": "Arroz Tio João 5kg R$ 24,90", "label": 1}
+(label 1 = linha de produto, 0 = cabeçalho, validade, etc.)
+
+Uso:
+
+    python -m scripts.train_line_classifier dados.jsonl \\
+        --output app/resources/line_classifier.npz
+
+Ao final imprime precisão/recall no conjunto de validação e a vazão
+comparada com a heurística is_product_line: linhas/s classificando uma
+página (~40 linhas) por chamada, como no processamento real, e o tempo
+de extração de ponta a ponta de um encarte sintético.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import time
+from typing import Optional
+
+import numpy as np
+
+from app.services.line_classifier import LineClassifier
+from app.services.pdf_processor import PDFProcessor
+from app.utils.helpers import is_product_line
+from benchmarks.flyer_generator import generate_flyer
+
+# Linhas de texto de uma página típica de encarte
+LINES_PER_PAGE = 40
+
+def load_dataset(path: str):
+	texts, labels = [], []
+	with open(path, encoding="utf-8") as f:
+		for raw in f:
+			raw = raw.strip()
+			if not raw:
+				continue
+			record = json.loads(raw)
+			texts.append(record["text"].strip())
+			labels.append(int(record["label"]))
+	return texts, np.array(labels, dtype=np.float32)
+
+def train(texts, labels, n_features: int, epochs: int, batch_size: int,
+		learning_rate: float, l2: float, seed: int) -> LineClassifier:
+	"""
+	Regressão logística com Adagrad em mini-lotes; gradientes são
+	acumulados com bincount sobre as features esparsas do lote
+	"""
+	model = LineClassifier.empty(n_features)
+	rng = np.random.default_rng(seed)
+	grad_sq = np.full(n_features, 1e-8, dtype=np.float64)
+	bias_sq = 1e-8
+
+	for epoch in range(epochs):
+		order = rng.permutation(len(texts))
+		total_loss = 0.0
+
+		for start in range(0, len(order), batch_size):
+			batch = order[start:start + batch_size]
+			batch_texts = [texts[i] for i in batch]
+			y = labels[batch]
+
+			features, rows, values = model.featurize(batch_texts)
+			scores = np.bincount(
+				rows, weights=model.weights[features] * values, minlength=len(batch)
+			) + model.bias
+			p = 1.0 / (1.0 + np.exp(-scores))
+			total_loss += float(-np.sum(y * np.log(p + 1e-12) + (1 - y) * np.log(1 - p + 1e-12)))
+
+			error = (p - y) / len(batch)
+			grad = np.bincount(features, weights=error[rows] * values, minlength=n_features)
+			touched = grad != 0
+			grad[touched] += l2 * model.weights[touched]
+			grad_sq += grad ** 2
+			model.weights -= (learning_rate * grad / np.sqrt(grad_sq)).astype(np.float32)
+
+			bias_grad = float(np.sum(error))
+			bias_sq += bias_grad ** 2
+			model.bias -= learning_rate * bias_grad / np.sqrt(bias_sq)
+
+		print(f"Época {epoch + 1}/{epochs}: log-loss {total_loss / len(texts):.4f}")
+
+	return model
+
+def precision_recall(predicted: np.ndarray, labels: np.ndarray):
+	truth = labels.astype(bool)
+	true_positives = int(np.sum(predicted & truth))
+	precision = true_positives / max(int(np.sum(predicted)), 1)
+	recall = true_positives / max(int(np.sum(truth)), 1)
+	return precision, recall
+
+def throughput(func, texts, repeat: int = 3, page_size: int = LINES_PER_PAGE) -> float:
+	"""Linhas/s chamando func uma vez por página, como em _classify_lines"""
+	pages = [texts[i:i + page_size] for i in range(0, len(texts), page_size)]
+	best = float("inf")
+	for _ in range(repeat):
+		start = time.perf_counter()
+		for page in pages:
+			func(page)
+		best = min(best, time.perf_counter() - start)
+	return len(texts) / best if best > 0 else float("inf")
+
+def extraction_time(model: Optional[LineClassifier], pages: int, repeat: int = 3) -> float:
+	"""Melhor tempo (s) de process_pdf sobre um encarte sintético"""
+	pdf, _ = generate_flyer(pages, seed=0)
+	with contextlib.redirect_stdout(io.StringIO()):
+		processor = PDFProcessor()
+	processor.line_classifier = model
+
+	best = float("inf")
+	try:
+		for _ in range(repeat):
+			start = time.perf_counter()
+			with contextlib.redirect_stdout(io.StringIO()):
+				asyncio.run(processor.process_pdf(pdf, "sintetico"))
+			best = min(best, time.perf_counter() - start)
+	finally:
+		processor.close()
+	return best
+
+def report(model: LineClassifier, texts, labels, flyer_pages: int = 6) -> dict:
+	model_pred = model.predict(texts)
+	heuristic_pred = np.array([is_product_line(t) for t in texts])
+
+	model_precision, model_recall = precision_recall(model_pred, labels)
+	heuristic_precision, heuristic_recall = precision_recall(heuristic_pred, labels)
+
+	return {
+		"validation_lines": len(texts),
+		"lines_per_call": LINES_PER_PAGE,
+		"flyer_pages": flyer_pages,
+		"classifier": {
+			"precision": round(model_precision, 4),
+			"recall": round(model_recall, 4),
+			"lines_per_sec": round(throughput(model.predict, texts)),
+			"extraction_sec": round(extraction_time(model, flyer_pages), 3)
+		},
+		"heuristic": {
+			"precision": round(heuristic_precision, 4),
+			"recall": round(heuristic_recall, 4),
+			"lines_per_sec": round(throughput(lambda ts: [is_product_line(t) for t in ts], texts)),
+			"extraction_sec": round(extraction_time(None, flyer_pages), 3)
+		}
+	}
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("dataset", help="JSONL com campos text e label")
+	parser.add_argument("--output", default="app/resources/line_classifier.npz")
+	parser.add_argument("--report", help="Salva o relatório em JSON neste caminho")
+	parser.add_argument("--n-features", type=int, default=2 ** 18)
+	parser.add_argument("--epochs", type=int, default=5)
+	parser.add_argument("--batch-size", type=int, default=256)
+	parser.add_argument("--learning-rate", type=float, default=0.5)
+	parser.add_argument("--l2", type=float, default=1e-6)
+	parser.add_argument("--threshold", type=float, default=0.5)
+	parser.add_argument("--validation-split", type=float, default=0.2)
+	parser.add_argument("--seed", type=int, default=42)
+	parser.add_argument("--flyer-pages", type=int, default=6,
+		help="Páginas do encarte sintético usado na medição de ponta a ponta")
+	args = parser.parse_args()
+
+	texts, labels = load_dataset(args.dataset)
+	print(f"{len(texts)} linhas carregadas ({int(labels.sum())} de produto)")
+
+	order = np.random.default_rng(args.seed).permutation(len(texts))
+	split = int(len(order) * (1 - args.validation_split))
+	train_idx, val_idx = order[:split], order[split:]
+
+	model = train(
+		[texts[i] for i in train_idx], labels[train_idx],
+		args.n_features, args.epochs, args.batch_size,
+		args.learning_rate, args.l2, args.seed
+	)
+	model.threshold = args.threshold
+
+	output_dir = os.path.dirname(args.output)
+	if output_dir:
+		os.makedirs(output_dir, exist_ok=True)
+	model.save(args.output)
+	print(f"Modelo salvo em {args.output}")
+
+	if len(val_idx):
+		result = report(model, [texts[i] for i in val_idx], labels[val_idx], args.flyer_pages)
+		print(json.dumps(result, indent=2))
+		if args.report:
+			with open(args.report, "w", encoding="utf-8") as f:
+				json.dump(result, f, indent=2)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+
+from app.services.admission_control import (
+	AdmissionController,
+	AdmissionRejected,
+	ConcurrencyLimiter,
+	TokenBucketLimiter,
+	resolve_client
+)
+
+@pytest.mark.parametrize("forwarded_for, peer, trusted_proxies, expected", [
+	(None, "10.0.0.1", 0, "10.0.0.1"),
+	("1.2.3.4", "10.0.0.1", 0, "10.0.0.1"),
+	("203.0.113.7", "10.0.0.1", 1, "203.0.113.7"),
+	("6.6.6.6, 203.0.113.7", "10.0.0.1", 1, "203.0.113.7"),
+	("6.6.6.6, 203.0.113.7, 10.0.0.2", "10.0.0.1", 2, "203.0.113.7"),
+	("203.0.113.7", "10.0.0.1", 2, "10.0.0.1"),
+	(None, None, 1, "anonymous"),
+])
+def test_resolve_client(forwarded_for, peer, trusted_proxies, expected):
+	assert resolve_client(forwarded_for, peer, trusted_proxies) == expected
+
+def test_spoofed_forwarded_for_does_not_mint_buckets():
+	limiter = TokenBucketLimiter(rate=1.0, burst=3)
+
+	waits = [
+		limiter.acquire(resolve_client(f"198.51.100.{i}, 203.0.113.7", "10.0.0.1", 1))
+		for i in range(10)
+	]
+
+	assert list(limiter.buckets) == ["203.0.113.7"]
+	assert waits[:3] == [0.0, 0.0, 0.0]
+	assert all(wait > 0 for wait in waits[3:])
+
+@pytest.fixture
+def clock(monkeypatch):
+	now = [1000.0]
+	monkeypatch.setattr("app.services.admission_control.time.monotonic", lambda: now[0])
+	return now
+
+@pytest.mark.parametrize("rate, burst, requests, elapsed, expected_wait", [
+	(1.0, 3, 3, 0.0, 0.0),
+	(1.0, 3, 4, 0.0, 1.0),
+	(2.0, 1, 2, 0.0, 0.5),
+	(1.0, 3, 4, 1.0, 0.0),
+	(0.5, 2, 3, 1.0, 1.0),
+	(1.0, 3, 4, 60.0, 0.0),
+])
+def test_token_bucket_refill(clock, rate, burst, requests, elapsed, expected_wait):
+	limiter = TokenBucketLimiter(rate=rate, burst=burst)
+	for _ in range(requests - 1):
+		assert limiter.acquire("client") == 0.0
+
+	clock[0] += elapsed
+	assert limiter.acquire("client") == pytest.approx(expected_wait)
+
+def test_token_bucket_prunes_idle_clients(clock):
+	limiter = TokenBucketLimiter(rate=1.0, burst=2, max_clients=2)
+	limiter.acquire("a")
+	limiter.acquire("b")
+
+	clock[0] += 10
+	limiter.acquire("c")
+
+	assert list(limiter.buckets) == ["c"]
+
+async def _hold(limiter: ConcurrencyLimiter, release: asyncio.Event):
+	async with limiter.slot("test"):
+		await release.wait()
+
+@pytest.mark.parametrize("max_concurrent, max_queue, queue_timeout, holders, reason", [
+	(1, 0, 1.0, 1, "queue_full"),
+	(1, 1, 1.0, 2, "queue_full"),
+	(2, 1, 1.0, 3, "queue_full"),
+	(1, 1, 0.01, 1, "queue_timeout"),
+	(1, 0, 1.0, 0, None),
+])
+def test_concurrency_limiter_rejections(max_concurrent, max_queue, queue_timeout, holders, reason):
+	async def scenario():
+		limiter = ConcurrencyLimiter(max_concurrent, max_queue, queue_timeout)
+		release = asyncio.Event()
+		tasks = [asyncio.create_task(_hold(limiter, release)) for _ in range(holders)]
+		await asyncio.sleep(0)
+
+		try:
+			async with limiter.slot("test"):
+				return None
+		except AdmissionRejected as e:
+			return e
+		finally:
+			release.set()
+			await asyncio.gather(*tasks, return_exceptions=True)
+
+	error = asyncio.run(scenario())
+
+	if reason is None:
+		assert error is None
+	else:
+		assert (error.status_code, error.reason) == (503, reason)
+
+def test_concurrency_limiter_queued_request_gets_released_slot():
+	async def scenario():
+		limiter = ConcurrencyLimiter(1, 1, 1.0)
+		release = asyncio.Event()
+		holder = asyncio.create_task(_hold(limiter, release))
+		await asyncio.sleep(0)
+
+		entered = asyncio.Event()
+
+		async def waiter():
+			async with limiter.slot("test"):
+				entered.set()
+
+		queued = asyncio.create_task(waiter())
+		await asyncio.sleep(0)
+		waiting = limiter.waiting
+
+		release.set()
+		await asyncio.wait_for(entered.wait(), timeout=1.0)
+		await asyncio.gather(holder, queued)
+		return waiting, limiter.waiting, limiter.semaphore.locked()
+
+	assert asyncio.run(scenario()) == (1, 0, False)
+
+def test_open_stream_release_is_idempotent(monkeypatch):
+	monkeypatch.setenv("PRICE_UPDATES_MAX_CONCURRENT", "1")
+
+	async def scenario():
+		controller = AdmissionController()
+		release = await controller.open_stream("price_updates", "a")
+
+		with pytest.raises(AdmissionRejected) as rejected:
+			await controller.open_stream("price_updates", "b")
+
+		release()
+		release()
+		reopened = await controller.open_stream("price_updates", "b")
+		semaphore = controller.concurrency_limiters["price_updates"].semaphore
+		locked = semaphore.locked()
+		reopened()
+		return rejected.value.reason, locked, semaphore.locked()
+
+	assert asyncio.run(scenario()) == ("connection_limit", True, False)
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from app.services.change_feed import ChangeFeed, compute_catalog_changes
+
+@pytest.mark.parametrize("old, new, expected", [
+	([], [{"name": "Arroz", "price": 20.0}],
+		[{"name": "Arroz", "change": "added", "old_price": None, "new_price": 20.0}]),
+	([{"name": "Arroz", "price": 20.0}], [],
+		[{"name": "Arroz", "change": "removed", "old_price": 20.0, "new_price": None}]),
+	([{"name": "Arroz", "price": 20.0}], [{"name": "Arroz", "price": "18.5"}],
+		[{"name": "Arroz", "change": "price_changed", "old_price": 20.0, "new_price": 18.5}]),
+	([{"name": "Arroz", "price": 20.0}], [{"name": "Arroz", "price": 20.001}], []),
+	([{"name": "Arroz", "price": 20.0}, {"name": "Café", "price": 9.9}],
+		[{"name": "Café", "price": 9.9}, {"name": "Feijão", "price": 7.0}],
+		[
+			{"name": "Feijão", "change": "added", "old_price": None, "new_price": 7.0},
+			{"name": "Arroz", "change": "removed", "old_price": 20.0, "new_price": None},
+		]),
+])
+def test_compute_catalog_changes(old, new, expected):
+	assert compute_catalog_changes(old, new) == expected
+
+def _event(*names):
+	return {
+		"supermarket": "mercado",
+		"timestamp": 1.0,
+		"changes": [
+			{"name": name, "change": "price_changed", "old_price": 10.0, "new_price": 9.0}
+			for name in names
+		]
+	}
+
+def _drain(subscription):
+	items = []
+	while not subscription.queue.empty():
+		items.append(subscription.queue.get_nowait())
+	return items
+
+@pytest.mark.parametrize("items, names, expected", [
+	(["arroz"], ["Arroz Tio João 5kg"], [{"arroz": ["Arroz Tio João 5kg"]}]),
+	([" ARROZ "], ["Arroz Camil"], [{"arroz": ["Arroz Camil"]}]),
+	(["arroz", "café"], ["Arroz Camil", "Café Pilão", "Feijão"],
+		[{"arroz": ["Arroz Camil"], "café": ["Café Pilão"]}]),
+	(["arroz"], ["Feijão Carioca"], []),
+	(["", "  "], ["Arroz Camil"], []),
+])
+def test_dispatch_matches_terms(items, names, expected):
+	feed = ChangeFeed()
+	subscription = feed.subscribe(items)
+
+	asyncio.run(feed.dispatch(_event(*names)))
+
+	delivered = [
+		{match["item"]: [change["name"] for change in match["changes"]] for match in delta["items"]}
+		for delta in _drain(subscription)
+	]
+	assert delivered == expected
+	assert subscription.lagged is False
+
+def test_dispatch_delivers_each_subscriber_only_its_items():
+	feed = ChangeFeed(terms_per_slice=1)
+	rice = feed.subscribe(["arroz"])
+	both = feed.subscribe(["arroz", "café"])
+
+	asyncio.run(feed.dispatch(_event("Arroz Camil", "Café Pilão")))
+
+	assert [match["item"] for match in _drain(rice)[0]["items"]] == ["arroz"]
+	assert [match["item"] for match in _drain(both)[0]["items"]] == ["arroz", "café"]
+
+@pytest.mark.parametrize("max_pending, events, queued, lagged", [
+	(2, 1, 1, False),
+	(2, 2, 2, False),
+	(2, 3, 2, True),
+	(1, 5, 1, True),
+])
+def test_dispatch_marks_slow_subscribers_as_lagged(max_pending, events, queued, lagged):
+	feed = ChangeFeed(max_pending=max_pending)
+	subscription = feed.subscribe(["arroz"])
+
+	async def scenario():
+		for _ in range(events):
+			await feed.dispatch(_event("Arroz Camil"))
+
+	asyncio.run(scenario())
+
+	assert subscription.queue.qsize() == queued
+	assert subscription.lagged is lagged
+
+@pytest.mark.parametrize("subscriptions, removed, remaining_terms", [
+	([["arroz"]], [0], {}),
+	([["arroz"], ["arroz", "café"]], [0], {"arroz": 1, "café": 1}),
+	([["arroz"], ["arroz", "café"]], [1], {"arroz": 1}),
+	([["arroz"], ["arroz", "café"]], [0, 1], {}),
+	([["arroz"]], [0, 0], {}),
+])
+def test_unsubscribe_cleans_up_terms(subscriptions, removed, remaining_terms):
+	feed = ChangeFeed()
+	subscribed = [feed.subscribe(items) for items in subscriptions]
+
+	for index in removed:
+		feed.unsubscribe(subscribed[index])
+
+	assert {term: len(subscribers) for term, subscribers in feed.terms.items()} == remaining_terms
+
+def test_unsubscribed_client_receives_nothing():
+	feed = ChangeFeed()
+	subscription = feed.subscribe(["arroz"])
+	feed.unsubscribe(subscription)
+
+	asyncio.run(feed.dispatch(_event("Arroz Camil")))
+
+	assert subscription.queue.empty()
@@ -0,0 +1,61 @@
+import pytest
+
+from app.utils.helpers import extract_price_span, extract_quantity, unit_price_fields
+
+@pytest.mark.parametrize("text, expected", [
+	("Arroz Tio João 5kg", (5.0, "kg")),
+	("Biscoito Recheado 200 g", (0.2, "kg")),
+	("Café Pilão 500gr", (0.5, "kg")),
+	("Sabão em Pó 1,5 kg", (1.5, "kg")),
+	("Leite Integral 1L", (1.0, "l")),
+	("Refrigerante 2 litros", (2.0, "l")),
+	("Suco 900ml", (0.9, "l")),
+	("Óleo de Soja 900 ML", (0.9, "l")),
+	("Cerveja 6x350ml", (2.1, "l")),
+	("Água Mineral 12 x 500 ml", (6.0, "l")),
+	("Ovos 12 un", (12.0, "un")),
+	("Picanha R$ 59,90 o kg", (1.0, "kg")),
+	("Tomate R$ 5,99/kg", (1.0, "kg")),
+	("Tomate Italiano kg 6,99", (1.0, "kg")),
+	("Sal 1 Kilo", (1.0, "kg")),
+	("Café Pilão Tradicional", None),
+	("", None),
+	(None, None),
+])
+def test_extract_quantity(text, expected):
+	assert extract_quantity(text) == expected
+
+@pytest.mark.parametrize("text", ["Leite 0 ml", "Arroz 0kg"])
+def test_extract_quantity_ignores_zero(text):
+	assert extract_quantity(text) is None
+
+@pytest.mark.parametrize("price, text, expected", [
+	(24.90, "Arroz 5kg", {"quantity": 5.0, "unit": "kg", "unit_price": 4.98}),
+	(21.0, "Cerveja 6x350ml", {"quantity": 2.1, "unit": "l", "unit_price": 10.0}),
+	(59.90, "Picanha o kg", {"quantity": 1.0, "unit": "kg", "unit_price": 59.9}),
+	(9.90, "Café Pilão", {"quantity": None, "unit": None, "unit_price": None}),
+])
+def test_unit_price_fields(price, text, expected):
+	assert unit_price_fields(price, text) == expected
+
+@pytest.mark.parametrize("line, expected", [
+	("Sabão em Pó Omo 1,50 kg R$ 19,90", {"quantity": 1.5, "unit": "kg", "unit_price": 13.2667}),
+	("Arroz Tio João 5kg R$ 24,90", {"quantity": 5.0, "unit": "kg", "unit_price": 4.98}),
+	("Cerveja Heineken 6x350ml R$21,00", {"quantity": 2.1, "unit": "l", "unit_price": 10.0}),
+	("Banana Prata R$ 4,99 kg", {"quantity": 1.0, "unit": "kg", "unit_price": 4.99}),
+	("Tomate Italiano kg 6,99", {"quantity": 1.0, "unit": "kg", "unit_price": 6.99}),
+	("Picanha Bovina R$ 59,90 o kg", {"quantity": 1.0, "unit": "kg", "unit_price": 59.9}),
+	("Café Pilão 9,90 R$", {"quantity": None, "unit": None, "unit_price": None}),
+])
+def test_unit_price_fields_from_raw_line(line, expected):
+	price, _, _ = extract_price_span(line)
+	assert unit_price_fields(price, line) == expected
+
+@pytest.mark.parametrize("line, expected", [
+	("Sabão em Pó Omo 1,50 kg R$ 19,90", (19.9, 24, 32)),
+	("Banana Prata R$ 4,99 kg", (4.99, 13, 20)),
+	("Tomate Italiano kg 6,99", (6.99, 19, 23)),
+	("Café Pilão Tradicional", None),
+])
+def test_extract_price_span(line, expected):
+	assert extract_price_span(line) == expected
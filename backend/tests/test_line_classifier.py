@@ -0,0 +1,69 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from app.services.line_classifier import LineClassifier
+
+def _ngrams_per_line(model, lines):
+	features, rows, _ = model.featurize(lines)
+	return [Counter(features[rows == row].tolist()) for row in range(len(lines))]
+
+@pytest.mark.parametrize("lines", [
+	["Arroz 5kg R$ 24,90", "Café Pilão R$ 9,90"],
+	["ab", "cd", "ef"],
+	["Validade: 10/10", "", "Leite 1L 4,99"],
+	["a", "b"],
+	["Açúcar União 1kg", "Óleo Liza 900ml"],
+])
+def test_featurize_has_no_ngrams_across_lines(lines):
+	model = LineClassifier.empty(n_features=2 ** 12)
+
+	together = _ngrams_per_line(model, lines)
+	separately = [_ngrams_per_line(model, [line])[0] for line in lines]
+
+	assert together == separately
+
+@pytest.mark.parametrize("lines", [
+	["Arroz 5kg R$ 24,90"],
+	["Arroz 5kg R$ 24,90", "Café 9,90", ""],
+])
+def test_featurize_values_are_normalized_per_line(lines):
+	model = LineClassifier.empty(n_features=2 ** 12)
+	_, rows, values = model.featurize(lines)
+
+	for row in set(rows.tolist()):
+		assert np.sum(values[rows == row] ** 2) == pytest.approx(1.0)
+
+@pytest.mark.parametrize("bias, lines, expected", [
+	(5.0, ["", "   "], [False, False]),
+	(5.0, ["Arroz 5kg R$ 24,90", ""], [True, False]),
+	(-5.0, ["Arroz 5kg R$ 24,90"], [False]),
+	(5.0, [], []),
+])
+def test_predict_never_accepts_blank_lines(bias, lines, expected):
+	model = LineClassifier(np.zeros(2 ** 12, dtype=np.float32), bias)
+	assert model.predict(lines).tolist() == expected
+
+def test_save_load_round_trip(tmp_path):
+	weights = np.random.default_rng(0).normal(size=2 ** 12).astype(np.float32)
+	model = LineClassifier(weights, bias=-0.3, ngram_range=(1, 3), threshold=0.7)
+	path = tmp_path / "model.npz"
+
+	model.save(str(path))
+	loaded = LineClassifier.load(str(path))
+
+	lines = ["Arroz 5kg R$ 24,90", "Validade: 10/10 a 16/10", ""]
+	assert np.array_equal(loaded.weights, model.weights)
+	assert (loaded.bias, loaded.ngram_range, loaded.threshold) == (-0.3, (1, 3), 0.7)
+	assert np.allclose(loaded.predict_proba(lines), model.predict_proba(lines))
+
+def test_load_rejects_unknown_format_version(tmp_path):
+	path = tmp_path / "model.npz"
+	np.savez_compressed(
+		path, format_version=999, weights=np.zeros(4, dtype=np.float32),
+		bias=0.0, ngram_min=2, ngram_max=4, threshold=0.5
+	)
+
+	with pytest.raises(ValueError):
+		LineClassifier.load(str(path))
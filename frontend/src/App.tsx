@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import { Search, ShoppingCart, DollarSign, Upload, Trash2 } from 'lucide-react';
 
@@ -10,6 +10,7 @@ function App() {
   const [comparisonResults, setComparisonResults] = useState([]);
   const [loading, setLoading] = useState(false);
   const [uploading, setUploading] = useState(false);
+  const [priceUpdates, setPriceUpdates] = useState([]);
 
   const addItem = () => {
     if (currentItem.name.trim()) {
@@ -28,6 +29,7 @@ function App() {
     try {
       const response = await axios.post(`${API_BASE_URL}/api/compare-prices`, shoppingList);
       setComparisonResults(response.data);
+      setPriceUpdates([]);
     } catch (error) {
       console.error('Error comparing prices:', error);
       alert('Erro ao comparar preços. Tente novamente.');
@@ -36,6 +38,31 @@ function App() {
     }
   };
 
+  // Ref com a versão mais recente de comparePrices, para o handler de
+  // resync não usar uma lista de compras desatualizada
+  const comparePricesRef = useRef(comparePrices);
+  useEffect(() => {
+    comparePricesRef.current = comparePrices;
+  });
+
+  // Após comparar, acompanha as mudanças de preço dos itens comparados
+  useEffect(() => {
+    if (comparisonResults.length === 0) return;
+
+    const params = new URLSearchParams();
+    comparisonResults.forEach(result => params.append('item', result.item.name));
+    const source = new EventSource(`${API_BASE_URL}/api/price-updates?${params}`);
+
+    source.addEventListener('price_update', (event) => {
+      setPriceUpdates(updates => [...updates, JSON.parse(event.data)]);
+    });
+    source.addEventListener('resync', () => {
+      comparePricesRef.current();
+    });
+
+    return () => source.close();
+  }, [comparisonResults]);
+
   const handleFileUpload = async (event) => {
     const file = event.target.files[0];
     if (!file) return;
@@ -202,6 +229,28 @@ function App() {
               Resultados da Comparação
             </h2>
 
+            {priceUpdates.length > 0 && (
+              <div className="mb-6 p-4 bg-yellow-50 border border-yellow-200 rounded-lg">
+                <p className="font-semibold text-yellow-800 mb-2">Novos preços disponíveis</p>
+                {priceUpdates.flatMap((update, updateIndex) =>
+                  update.items.flatMap(match =>
+                    match.changes.map((change, changeIndex) => (
+                      <p key={`${updateIndex}-${match.item}-${changeIndex}`} className="text-sm text-yellow-700">
+                        {update.supermarket}: {change.name}{' '}
+                        {change.new_price !== null ? `R$ ${change.new_price.toFixed(2)}` : '(removido)'}
+                      </p>
+                    ))
+                  )
+                )}
+                <button
+                  onClick={comparePrices}
+                  className="mt-3 text-sm font-semibold text-yellow-800 underline"
+                >
+                  Atualizar comparação
+                </button>
+              </div>
+            )}
+
             {comparisonResults.length > 0 && (
               <div className="mb-6 p-4 bg-green-50 border border-green-200 rounded-lg">
                 <div className="text-center">